@@ -0,0 +1,107 @@
+import os, sys, argparse, json, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+# ---------- worker side ----------
+# Mỗi process dựng 1 HeadlessRunner (load config 1 lần) rồi dùng lại cho mọi lượt chơi.
+_runner = None
+
+def _init_worker(base_dir, dt):
+    global _runner
+    from engine.headless import HeadlessRunner
+    _runner = HeadlessRunner(base_dir, dt=dt)
+
+def _play(level_index, seed):
+    res = _runner.run_level(level_index, seed=seed)
+    st = res["stats"]
+    return {
+        "level_index": level_index,
+        "level_id": res["level_id"],
+        "seed": seed,
+        "win": res["win"],
+        "production": st.get("production", 0),
+        "hp": st.get("hp", 0),
+        # thời gian chơi tới lúc kết thúc (== time-to-goal khi thắng)
+        "elapsed": res["sim_time"],
+    }
+
+# ---------- aggregation ----------
+def percentile(values, q):
+    if not values:
+        return None
+    vs = sorted(values)
+    k = (len(vs) - 1) * q
+    lo = int(k); hi = min(lo + 1, len(vs) - 1)
+    return vs[lo] + (vs[hi] - vs[lo]) * (k - lo)
+
+def summarize(runs):
+    prod = [r["production"] for r in runs]
+    hp = [r["hp"] for r in runs]
+    ttg = [r["elapsed"] for r in runs if r["win"]]
+    dist = lambda vs: {"mean": sum(vs) / len(vs), "min": min(vs), "p10": percentile(vs, 0.10),
+                       "p50": percentile(vs, 0.50), "p90": percentile(vs, 0.90), "max": max(vs)}
+    return {
+        "runs": len(runs),
+        "win_rate": sum(1 for r in runs if r["win"]) / len(runs),
+        "production": dist(prod),
+        "hp": dist(hp),
+        "time_to_goal": ({"p10": percentile(ttg, 0.10), "p50": percentile(ttg, 0.50),
+                          "p90": percentile(ttg, 0.90)} if ttg else None),
+    }
+
+def format_summary(level, s):
+    pr, hp, tg = s["production"], s["hp"], s["time_to_goal"]
+    line = (f"{level.level_id:>4} {level.name[:28]:<28} win {s['win_rate']*100:5.1f}%  "
+            f"prod {pr['mean']:5.1f} [{pr['p10']:.0f}/{pr['p50']:.0f}/{pr['p90']:.0f}]/{level.goal}  "
+            f"hp {hp['mean']:4.1f} [{hp['min']}..{hp['max']}]")
+    if tg:
+        line += f"  ttg p10/p50/p90 {tg['p10']:.1f}/{tg['p50']:.1f}/{tg['p90']:.1f}s"
+    return line
+
+# ---------- main ----------
+def main():
+    ap = argparse.ArgumentParser(description="Monte-Carlo level balancer: N seeded headless games per level.")
+    ap.add_argument("-n", "--runs", type=int, default=100, help="games per level")
+    ap.add_argument("--seed", type=int, default=0, help="base seed (run i uses seed+i)")
+    ap.add_argument("--dt", type=float, default=1.0 / 60.0)
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    ap.add_argument("--levels", nargs="*", default=None, help="level_ids to run (default: all)")
+    ap.add_argument("--json", default=None, help="write the per-level summary to this file")
+    args = ap.parse_args()
+
+    from data.loader import Loader
+    levels = Loader(BASE_DIR).load_levels()
+    picked = [i for i, lv in enumerate(levels) if not args.levels or lv.level_id in args.levels]
+    total = len(picked) * args.runs
+
+    runs = {i: [] for i in picked}
+    summaries = {}
+    done = 0
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(BASE_DIR, args.dt)) as pool:
+        futs = [pool.submit(_play, i, args.seed + k) for i in picked for k in range(args.runs)]
+        # stream: mỗi lượt xong là cập nhật ngay, level nào đủ N lượt thì in tổng kết luôn
+        for fut in as_completed(futs):
+            r = fut.result()
+            done += 1
+            runs[r["level_index"]].append(r)
+            sys.stderr.write(f"\r[{done}/{total}] {r['level_id']} seed={r['seed']} "
+                             f"{'WIN ' if r['win'] else 'LOSE'} prod={r['production']} hp={r['hp']}   ")
+            if len(runs[r["level_index"]]) == args.runs:
+                lv = levels[r["level_index"]]
+                summaries[lv.level_id] = summarize(runs[r["level_index"]])
+                sys.stderr.write("\r")
+                print(format_summary(lv, summaries[lv.level_id]), flush=True)
+    sys.stderr.write(f"\r{total} games in {time.perf_counter() - t0:.1f}s\n")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+if __name__ == "__main__":
+    main()
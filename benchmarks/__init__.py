@@ -0,0 +1,11 @@
+"""
+Microbenchmark của Rogue Factory (SDL dummy driver, chạy được trên Linux không màn hình).
+
+    python -m benchmarks                       # mọi suite, in bảng + ghi benchmarks/results/latest.json
+    python -m benchmarks geometry robots       # chỉ vài suite
+    python -m benchmarks --out base.json       # lưu baseline
+    python -m benchmarks --compare base.json   # so với baseline, exit 1 nếu chậm hơn --threshold
+
+bench_path_sampling.py / bench_robot_memory.py vẫn là script chạy riêng.
+"""
+SUITES = ("geometry", "robots", "loader", "gameplay")
@@ -0,0 +1,43 @@
+import argparse, importlib, os, sys
+
+from .harness import BASE_DIR, Runner, setup_env, save, load, compare
+from . import SUITES
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the microbenchmark suites.")
+    ap.add_argument("suites", nargs="*", metavar="SUITE",
+                    help=f"suites to run (default: all of {', '.join(SUITES)})")
+    ap.add_argument("-k", dest="pattern", default=None, help="only benchmarks whose name contains this")
+    ap.add_argument("--repeat", type=int, default=5, help="samples per benchmark (best is reported)")
+    ap.add_argument("--min-time", type=float, default=0.02, help="minimum seconds per sample")
+    ap.add_argument("--quick", action="store_true", help="smaller populations, for a fast smoke run")
+    ap.add_argument("--out", default=os.path.join(BASE_DIR, "benchmarks", "results", "latest.json"),
+                    help="where to write the JSON results")
+    ap.add_argument("--compare", metavar="BASELINE", default=None, help="JSON results to compare against")
+    ap.add_argument("--threshold", type=float, default=0.10, help="slowdown ratio counted as a regression")
+    args = ap.parse_args(argv)
+    unknown = [s for s in args.suites if s not in SUITES]
+    if unknown:
+        ap.error(f"unknown suite(s): {', '.join(unknown)} (choose from {', '.join(SUITES)})")
+
+    setup_env()
+    runner = Runner(repeat=args.repeat, min_time=args.min_time, quick=args.quick, pattern=args.pattern)
+    for name in args.suites or SUITES:
+        print(f"[{name}]", flush=True)
+        importlib.import_module(f"benchmarks.bench_{name}").run(runner)
+
+    data = runner.to_json()
+    if args.out:
+        save(args.out, data)
+        print(f"\nwrote {len(runner.results)} results to {args.out}")
+    if args.compare:
+        slower = compare(load(args.compare), data, args.threshold)
+        if slower:
+            print(f"\n{len(slower)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
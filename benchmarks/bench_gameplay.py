@@ -0,0 +1,78 @@
+"""
+GameplayState.update / draw với số robot tăng dần (cả 2 engine nếu có numpy).
+Robot được rải sẵn dọc các lane, fuse rất dài, time/hp/goal không giới hạn -> game không kết thúc giữa chừng.
+"""
+import random
+
+from .harness import BASE_DIR
+
+DT = 1.0 / 60.0
+UPDATE_STEPS = 5  # số update mỗi mẫu đo (cố định: update làm robot tiến lên, không để autorange chạy quá dài)
+
+
+def pick_level(app):
+    # level có nhiều lane nhất (nhiều robot trên màn hình nhất)
+    def lanes(i):
+        m = app.maps.get(app.levels[i].map)
+        return len(m.paths) if m is not None else 0
+    return max(range(len(app.levels)), key=lambda i: (lanes(i), -i))
+
+
+def populate(gp, n, seed=0):
+    rng = random.Random(seed)
+    n_lanes = len(gp.paths)
+    per_lane = [n // n_lanes + (1 if i < n % n_lanes else 0) for i in range(n_lanes)]
+    for lane, count in enumerate(per_lane):
+        sp = gp.spawners[lane]
+        # thứ tự spawn thật: robot vào trước đi xa hơn -> t giảm dần (RobotLanes không phải sort lại)
+        ts = sorted((rng.uniform(0.0, 0.9) for _ in range(count)), reverse=True)
+        if gp.sim is not None:
+            for _ in ts:
+                gp.sim.spawn(lane, *sp.robot_defs[sp._weighted_index()][0::2])
+            L = gp.sim.lanes[lane]
+            L.flush()  # spawn() chỉ xếp hàng tới bước kế tiếp
+            if len(L):
+                L.cols["t"][-count:] = ts
+                L.cols["t_prev"][-count:] = ts
+                L.cols["fuse"][-count:] = 1e9
+            continue
+        for t in ts:
+            cls, kwargs = sp._templates[sp._weighted_index()]
+            if cls is None:
+                continue
+            r = cls(**dict(kwargs, t=t))
+            r._prev_t = t
+            if hasattr(r, "fuse_time"):
+                r.fuse_time = 1e9
+            gp.robots.append(r)
+
+
+def fresh_state(app, level_index, n):
+    from states.gameplay import GameplayState
+
+    gp = GameplayState(app)
+    app.switch_state(gp, level_index=level_index, seed=0)
+    gp.time_left = gp.hp = gp.goal = 10 ** 9
+    populate(gp, n)
+    return gp
+
+
+def run(runner):
+    from engine.app import GameApp
+    from robots import arrays
+
+    app = GameApp(BASE_DIR)
+    app.audio = None
+    app.dirty_rects = False  # đo vẽ lại cả khung hình
+    level = pick_level(app)
+    engines = ["objects"] + (["arrays"] if arrays.available() else [])
+    counts = (100, 1000) if runner.quick else (100, 1000, 5000)
+    for engine in engines:
+        app.config.setdefault("simulation", {})["engine"] = engine
+        for n in counts:
+            gp = fresh_state(app, level, n)
+            runner.time(f"gameplay.{engine}.update[{n}]", lambda: gp.update(DT), per=n, number=UPDATE_STEPS)
+            gp = fresh_state(app, level, n)
+            gp.draw(app.screen)  # dựng layer tĩnh trước khi đo
+            runner.time(f"gameplay.{engine}.draw[{n}]", lambda: gp.draw(app.screen), per=n)
+    app.pop_state()
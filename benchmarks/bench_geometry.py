@@ -0,0 +1,41 @@
+"""Hàm hình học của engine.geometry trên mọi map trong configs/maps."""
+import random
+
+from .harness import BASE_DIR
+
+W, H = 1280, 720
+N_SAMPLES = 1000   # số t mỗi lần gọi sample_path_t
+N_PROJECT = 200    # số điểm mỗi lần gọi project_point_to_t
+
+
+def run(runner):
+    from data.loader import Loader
+    from engine.geometry import rescale_points, polyline_length, sample_path_t, project_point_to_t
+
+    maps = Loader(BASE_DIR).load_maps()
+    rng = random.Random(0)
+    for map_id in sorted(maps):
+        norm = [p.points for p in maps[map_id].paths if p.points]
+        if not norm:
+            continue
+        paths = [rescale_points(n, W, H) for n in norm]
+        lengths = [polyline_length(p) for p in paths]
+        ts = [rng.random() for _ in range(N_SAMPLES)]
+        pts = [(rng.randrange(W), rng.randrange(H)) for _ in range(N_PROJECT)]
+
+        runner.time(f"geometry.rescale_points[{map_id}]",
+                    lambda: [rescale_points(n, W, H) for n in norm], per=len(norm))
+        runner.time(f"geometry.polyline_length[{map_id}]",
+                    lambda: [polyline_length(p) for p in paths], per=len(paths))
+
+        def sample():
+            for p, L in zip(paths, lengths):
+                for t in ts:
+                    sample_path_t(p, t, L)
+        runner.time(f"geometry.sample_path_t[{map_id}]", sample, per=N_SAMPLES * len(paths))
+
+        def project():
+            for p in paths:
+                for x, y in pts:
+                    project_point_to_t(p, x, y)
+        runner.time(f"geometry.project_point_to_t[{map_id}]", project, per=N_PROJECT * len(paths))
@@ -0,0 +1,15 @@
+"""
+Đọc config: Loader.load_maps / load_levels (Loader mới mỗi lần -> không dùng cache preset trong RAM).
+[cached] đọc cache đã biên dịch (.cache/config), [parse] luôn parse YAML.
+"""
+from .harness import BASE_DIR
+
+
+def run(runner):
+    from data.loader import Loader
+
+    Loader(BASE_DIR).load_levels()  # dựng cache trước khi đo
+    for label, cache_dir in (("cached", ""), ("parse", None)):
+        runner.time(f"loader.load_game_config[{label}]", lambda: Loader(BASE_DIR, cache_dir).load_game_config())
+        runner.time(f"loader.load_maps[{label}]", lambda: Loader(BASE_DIR, cache_dir).load_maps())
+        runner.time(f"loader.load_levels[{label}]", lambda: Loader(BASE_DIR, cache_dir).load_levels())
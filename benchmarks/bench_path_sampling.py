@@ -0,0 +1,54 @@
+"""
+Scalar vs batched robot position lookup: 10k robots trên map double_u.
+
+    python benchmarks/bench_path_sampling.py [--robots 10000] [--repeat 20]
+"""
+import os, sys, argparse, random, time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+for p in (BASE_DIR, SRC_DIR):
+    if p not in sys.path:
+        sys.path.append(p)
+
+import numpy as np
+from data.loader import Loader
+from engine.geometry import rescale_points, sample_path_t, PathGeometry
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--robots", type=int, default=10000)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--map", default="double_u")
+    args = ap.parse_args()
+
+    m = Loader(BASE_DIR).load_maps()[args.map]
+    pts = rescale_points(m.paths[0].points, 1280, 720)
+    geom = PathGeometry(pts)
+    rng = random.Random(0)
+    ts = [rng.random() for _ in range(args.robots)]
+    ts_np = np.asarray(ts)
+
+    # cùng kết quả trước khi đo
+    assert geom.positions(ts_np).tolist() == [list(sample_path_t(pts, t)) for t in ts]
+
+    cases = [
+        ("sample_path_t (scalar)", lambda: [sample_path_t(pts, t) for t in ts]),
+        ("PathGeometry.point_at", lambda: [geom.point_at(t) for t in ts]),
+        ("PathGeometry.positions", lambda: geom.positions(ts_np)),
+    ]
+    base = None
+    print(f"{args.robots} robots on '{args.map}' ({len(pts)} points), best of {args.repeat}")
+    for name, fn in cases:
+        t = best_of(fn, args.repeat)
+        base = base or t
+        print(f"  {name:<26} {t*1000:8.3f} ms   x{base/t:6.1f}")
+
+if __name__ == "__main__":
+    main()
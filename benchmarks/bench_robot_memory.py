@@ -0,0 +1,88 @@
+"""
+Bộ nhớ + tốc độ truy cập field của robot (RobotOK / RobotBAD) ở 10k và 100k con,
+layout __slots__ hiện tại đặt cạnh bản đối chứng __dict__ (dict_layout).
+Bản đối chứng vẫn mang các ô slot rỗng (8 B/field) -> B/robot của __dict__ hơi cao hơn class không slot thật.
+
+    python benchmarks/bench_robot_memory.py [--counts 10000 100000] [--repeat 5]
+"""
+import os, sys, argparse, gc, random, time, tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+for p in (BASE_DIR, SRC_DIR):
+    if p not in sys.path:
+        sys.path.append(p)
+
+import robots  # ensure registration
+from data.registry import ROBOT_TYPES
+from engine.geometry import PathGeometry
+
+PATH = [(0, 360), (640, 100), (1280, 360)]
+STATIONS = [(k + 1) / 13 for k in range(12)]
+
+def dict_layout(cls):
+    # subclass có __dict__; mọi field slot bị che bằng class attribute thường (không phải data
+    # descriptor) -> get/set đi qua __dict__ như trước khi có __slots__, method / super() giữ nguyên
+    names = {n for k in cls.__mro__ for n in getattr(k, "__slots__", ()) if n not in ("__dict__", "__weakref__")}
+    return type(cls.__name__ + "Dict", (cls,), dict.fromkeys(names))
+
+def make_robots(n, geom, ok, bad):
+    rng = random.Random(0)
+    out = []
+    for i in range(n):
+        cls = bad if i % 4 == 0 else ok
+        out.append(cls(path_id=0, path_pts=PATH, path_geom=geom, t=rng.random(),
+                       station_ts=STATIONS, type_name="BAD" if cls is bad else "OK"))
+    return out
+
+def measure_memory(n, geom, ok, bad):
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    rs = make_robots(n, geom, ok, bad)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return rs, used
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--counts", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    geom = PathGeometry(PATH)
+    ok, bad = ROBOT_TYPES["OK"], ROBOT_TYPES["BAD"]
+    layouts = (("__slots__", ok, bad), ("__dict__", dict_layout(ok), dict_layout(bad)))
+    for n in args.counts:
+        rows = []
+        for label, ok_cls, bad_cls in layouts:
+            rs, used = measure_memory(n, geom, ok_cls, bad_cls)
+
+            def read_fields():
+                s = 0.0
+                for r in rs:
+                    if r.alive and r._dwell_left <= 0:
+                        s += r.t * r.speed
+                return s
+
+            def update():
+                for r in rs:
+                    r.update(1e-6, False)
+
+            rows.append((label, used, best_of(read_fields, args.repeat), best_of(update, args.repeat)))
+            del rs
+            gc.collect()
+        for label, used, read, upd in rows:
+            print(f"  {n:>7} robots  {label:<9} {used / 1e6:8.2f} MB  ({used / n:6.0f} B/robot)"
+                  f"   read {read * 1e9 / n:6.1f} ns/robot   update {upd * 1e9 / n:7.1f} ns/robot")
+        (_, m_s, r_s, u_s), (_, m_d, r_d, u_d) = rows
+        print(f"  {'':>7}         slots/dict   memory x{m_s / m_d:.2f}   read x{r_s / r_d:.2f}   update x{u_s / u_d:.2f}")
+
+if __name__ == "__main__":
+    main()
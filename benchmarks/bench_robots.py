@@ -0,0 +1,32 @@
+"""RobotBase.update / RobotBAD.update trên 100 / 1k / 10k robot (1 lane, không app)."""
+import random
+
+PATH = [(0, 360), (640, 100), (1280, 360)]
+STATIONS = [(k + 1) / 13 for k in range(12)]
+DT = 1e-4  # bước rất nhỏ: robot gần như đứng yên qua mọi lần lặp -> các mẫu đo so sánh được
+
+
+def make_robots(cls, n, geom, **kwargs):
+    rng = random.Random(0)
+    ts = sorted(rng.uniform(0.0, 0.9) for _ in range(n))
+    return [cls(path_id=0, path_pts=PATH, path_geom=geom, t=t, station_ts=STATIONS, **kwargs) for t in ts]
+
+
+def run(runner):
+    import robots  # ensure registration
+    from robots.base import RobotBase
+    from robots.bad import RobotBAD
+    from engine.geometry import PathGeometry
+
+    geom = PathGeometry(PATH)
+    counts = (100, 1000) if runner.quick else (100, 1000, 10000)
+    for n in counts:
+        # fuse rất dài: BAD không nổ giữa chừng
+        for label, cls, kw in (("RobotBase", RobotBase, {}),
+                               ("RobotBAD", RobotBAD, {"fuse_time": 1e9, "type_name": "BAD"})):
+            rs = make_robots(cls, n, geom, **kw)
+
+            def update(rs=rs):
+                for r in rs:
+                    r.update(DT, False)
+            runner.time(f"robots.{label}.update[{n}]", update, per=n)
@@ -0,0 +1,140 @@
+import os, sys, json, platform, statistics, time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+
+
+def setup_env():
+    # chạy được trên máy Linux trơn: không cửa sổ, không card âm thanh
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    for p in (BASE_DIR, SRC_DIR):
+        if p not in sys.path:
+            sys.path.append(p)
+
+
+def measure(fn, repeat=5, min_time=0.02, number=None):
+    """
+    Kiểu timeit.autorange: tăng number tới khi 1 mẫu >= min_time, lấy repeat mẫu.
+    -> (best, median) giây cho 1 lần gọi fn(), number
+    """
+    if number is None:
+        number = 1
+        while True:
+            t0 = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - t0 >= min_time or number >= 1 << 20:
+                break
+            number *= 2
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return min(samples), statistics.median(samples), number
+
+
+class Runner:
+    """
+    Gom kết quả các suite: name -> {best, median, number, repeat, per}.
+    per = số phần tử mỗi lần gọi (robot, điểm...) -> in thêm ns/phần tử.
+    """
+    def __init__(self, repeat=5, min_time=0.02, quick=False, pattern=None, out=sys.stdout):
+        self.repeat = int(repeat)
+        self.min_time = float(min_time)
+        self.quick = quick
+        self.pattern = pattern
+        self.out = out
+        self.results = {}
+
+    def wants(self, name):
+        return not self.pattern or self.pattern in name
+
+    def time(self, name, fn, per=1, number=None, repeat=None):
+        if not self.wants(name):
+            return None
+        best, median, n = measure(fn, repeat or self.repeat, self.min_time, number)
+        res = {"best": best, "median": median, "number": n, "repeat": repeat or self.repeat, "per": per}
+        self.results[name] = res
+        if self.out is not None:
+            line = f"  {name:<52} {fmt_time(best):>10}  (median {fmt_time(median)})"
+            if per > 1:
+                line += f"  {best * 1e9 / per:9.1f} ns/item"
+            print(line, file=self.out, flush=True)
+        return res
+
+    def to_json(self):
+        return {"meta": environment(), "results": self.results}
+
+
+def fmt_time(sec):
+    if sec >= 1.0:
+        return f"{sec:.3f} s"
+    if sec >= 1e-3:
+        return f"{sec * 1e3:.3f} ms"
+    return f"{sec * 1e6:.2f} us"
+
+
+def environment():
+    meta = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "video_driver": os.environ.get("SDL_VIDEODRIVER", ""),
+    }
+    try:
+        import pygame
+        meta["pygame"] = pygame.version.ver
+    except ImportError:
+        pass
+    try:
+        import numpy
+        meta["numpy"] = numpy.__version__
+    except ImportError:
+        pass
+    return meta
+
+
+def save(path, data):
+    d = os.path.dirname(os.path.abspath(path))
+    os.makedirs(d, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.10, out=sys.stdout):
+    """
+    So best time từng benchmark với baseline.
+    -> list tên chậm hơn baseline quá threshold (0.10 = 10%)
+    """
+    old, new = baseline.get("results", {}), current.get("results", {})
+    regressions = []
+    print(f"\ncompare vs baseline ({baseline.get('meta', {}).get('time', '?')}), threshold {threshold:.0%}",
+          file=out)
+    for name in sorted(new):
+        if name not in old:
+            print(f"  {name:<52} {fmt_time(new[name]['best']):>10}  (new)", file=out)
+            continue
+        a, b = old[name]["best"], new[name]["best"]
+        ratio = b / a if a > 0 else float("inf")
+        tag = ""
+        if ratio > 1.0 + threshold:
+            tag = "  SLOWER"
+            regressions.append(name)
+        elif ratio < 1.0 / (1.0 + threshold):
+            tag = "  faster"
+        print(f"  {name:<52} {fmt_time(a):>10} -> {fmt_time(b):>10}  x{a / b if b > 0 else 0:5.2f}{tag}", file=out)
+    skipped = len(set(old) - set(new))
+    if skipped:
+        print(f"  ({skipped} baseline benchmarks not run)", file=out)
+    return regressions
@@ -0,0 +1,45 @@
+import os, sys, argparse, time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+for p in (BASE_DIR, SRC_DIR):
+    if p not in sys.path:
+        sys.path.append(p)
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from data.loader import Loader
+from engine.assets import AssetCache, sprite_manifest, vfx_manifest
+
+def main():
+    ap = argparse.ArgumentParser(description="Pre-scale sprite/VFX images into the asset cache (assets.cache_dir).")
+    ap.add_argument("--cache-dir", default=None, help="override assets.cache_dir from game.yaml")
+    ap.add_argument("--clean", action="store_true", help="delete cached files first")
+    args = ap.parse_args()
+
+    config = Loader(BASE_DIR).load_game_config()
+    cache_dir = args.cache_dir or (config.get("assets", {}) or {}).get("cache_dir", ".cache/assets")
+    if not cache_dir:
+        print("assets.cache_dir is empty: disk cache disabled")
+        return
+    if not os.path.isabs(cache_dir):
+        cache_dir = os.path.join(BASE_DIR, cache_dir)
+    if args.clean and os.path.isdir(cache_dir):
+        for f in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, f))
+
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    cache = AssetCache(cache_dir)
+    t0 = time.perf_counter()
+    for manifest in (sprite_manifest(BASE_DIR, config), vfx_manifest(BASE_DIR, config)):
+        for key, entries in manifest.items():
+            frames = cache.load_group(entries)
+            sizes = ", ".join(f"{img.get_width()}x{img.get_height()}" for img in frames)
+            print(f"  {key:<10} {len(frames)} frame(s)  {sizes}")
+    cache.save_index()
+    print(f"{cache.misses} built, {cache.hits} up to date -> {cache_dir} ({(time.perf_counter()-t0)*1000:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import os, sys, argparse, json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
+
+from engine.headless import HeadlessRunner
+
+def main():
+    ap = argparse.ArgumentParser(description="Run levels headless (no window, no audio, fixed dt).")
+    ap.add_argument("levels", nargs="*", help="level index or level_id (default: all levels)")
+    ap.add_argument("--dt", type=float, default=1.0 / 60.0, help="fixed simulation step in seconds")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--engine", choices=("objects", "arrays"), default=None,
+                    help="robot simulation engine (default: simulation.engine in game.yaml)")
+    ap.add_argument("--json", action="store_true", help="print one JSON object per level")
+    ap.add_argument("--replay", metavar="FILE", default=None,
+                    help="re-run a recorded session (replays/*.rfr) and check it reproduces")
+    ap.add_argument("--check-replay", action="store_true",
+                    help="record sessions ended early (window close / ESC), replay them and check they match")
+    args = ap.parse_args()
+
+    if args.check_replay:
+        sys.exit(check_replay(args))
+
+    if args.replay:
+        from engine.replay import Replay
+        rp = Replay.load(args.replay)
+        runner = HeadlessRunner(BASE_DIR, dt=rp.dt, engine=rp.engine, assets=rp.assets)
+        res = runner.run_replay(rp)
+        if args.json:
+            print(json.dumps(res))
+        else:
+            st = res["stats"]
+            ok = {True: "OK", False: "MISMATCH", None: "no end marker"}[res["verified"]]
+            print(f"{res['level_id']:>4}  seed {res['seed']}  {res['events']} events  "
+                  f"prod {st['production']}/{st['goal']}  hp {st['hp']}  steps {res['steps']}  "
+                  f"| replay {ok}  {res['sim_time']:.1f}s sim in {res['wall_time']*1000:.0f}ms (x{res['speedup']:.0f})")
+        sys.exit(0 if res["verified"] is not False else 1)
+
+    runner = HeadlessRunner(BASE_DIR, dt=args.dt, engine=args.engine)
+    keys = args.levels or [str(i) for i in range(len(runner.levels))]
+    for key in keys:
+        res = runner.run_level(runner.find_level(key), seed=args.seed)
+        if args.json:
+            print(json.dumps(res))
+            continue
+        st = res["stats"]
+        print(f"{res['level_id']:>4}  {'WIN ' if res['win'] else 'LOSE'}  "
+              f"prod {st['production']}/{st['goal']}  hp {st['hp']}  time_left {st['time_left']:.1f}s  "
+              f"| {res['sim_time']:.1f}s sim in {res['wall_time']*1000:.0f}ms (x{res['speedup']:.0f})"
+              + (f"  pool {res['pool']['hits']} hit / {res['pool']['misses']} miss" if res.get("pool") else ""))
+
+def check_replay(args):
+    # mỗi level x engine x cách thoát: ghi 1 phiên dừng giữa chừng rồi chạy lại từ file
+    import tempfile
+    from engine.replay import Replay
+    from robots import arrays
+
+    engines = [args.engine] if args.engine else ["objects"] + (["arrays"] if arrays.available() else [])
+    runner = HeadlessRunner(BASE_DIR, dt=args.dt)
+    keys = args.levels or [str(i) for i in range(len(runner.levels))]
+    seed = args.seed if args.seed is not None else 1
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for key in keys:
+            idx = runner.find_level(key)
+            end_step = int(runner.levels[idx].time / 2 / runner.dt)
+            for engine in engines:
+                for end in ("quit", "key"):
+                    runner.app.config.setdefault("simulation", {})["engine"] = engine
+                    path, expect = runner.record_session(idx, seed, os.path.join(tmp, f"{engine}_{end}"), end_step, end)
+                    rp = Replay.load(path)
+                    res = runner.run_replay(rp)
+                    ok = res["verified"] is True and rp.end == expect
+                    failed += not ok
+                    print(f"{res['level_id']:>4}  {engine:<7}  end={end:<4}  {res['events']} events  "
+                          f"end {rp.end}  | {'OK' if ok else 'MISMATCH'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-import os, sys
+import time
+T0 = time.perf_counter()  # mốc 0 của --profile-startup
+import os, sys, argparse
 import pygame
 
 BASE_DIR = os.path.dirname(__file__)
@@ -7,9 +9,18 @@ if SRC_DIR not in sys.path:
     sys.path.append(SRC_DIR)
 
 from engine.app import GameApp
+from engine import startup
+T_IMPORTS = time.perf_counter()
 
 def main():
-    app = GameApp(base_dir=BASE_DIR)
+    ap = argparse.ArgumentParser(description="Rogue Factory")
+    ap.add_argument("--profile-startup", action="store_true",
+                    help="print time per startup phase up to the first menu frame, then exit")
+    args = ap.parse_args()
+    if args.profile_startup:
+        startup.enable(T0)
+        startup.add("imports", T0, T_IMPORTS)
+    app = GameApp(base_dir=BASE_DIR, async_boot=True)
     app.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+import os, pickle, threading
+import yaml
+
+# libyaml (C) nếu PyYAML được build kèm, không thì loader thuần Python
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+CACHE_VERSION = 1
+CACHE_FILE = "configs.pickle"
+# đổi code chuẩn hoá (loader / schema) -> bỏ toàn bộ cache cũ
+_CODE_FILES = ("loader.py", "schema.py", "cache.py")
+
+
+def parse_yaml(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=YAML_LOADER)
+
+
+def _code_stamp():
+    here = os.path.dirname(os.path.abspath(__file__))
+    stamp = []
+    for name in _CODE_FILES:
+        try:
+            st = os.stat(os.path.join(here, name))
+            stamp.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((name, 0, 0))
+    return tuple(stamp)
+
+
+class ConfigCache:
+    """
+    Cache kết quả đã chuẩn hoá (dict / MapSpec / LevelSpec...) của từng file config,
+    key (kind, đường dẫn tương đối), hợp lệ khi mtime + size của file không đổi.
+    Lưu 1 file pickle trong cache_dir; file đổi thì chỉ file đó bị parse lại.
+    Giá trị giữ ở dạng bytes pickle -> mỗi lần get() trả object mới (như parse lại).
+    """
+    def __init__(self, cache_dir, root):
+        self.cache_dir = cache_dir
+        self.root = root
+        self.path = os.path.join(cache_dir, CACHE_FILE)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stamp = _code_stamp()
+        self._entries = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, "rb") as f:
+                version, stamp, entries = pickle.load(f)
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            return {}
+        if version != CACHE_VERSION or stamp != self._stamp:
+            self._dirty = True
+            return {}
+        return entries
+
+    def get(self, kind, path, build):
+        # build(path) -> giá trị đã chuẩn hoá, chỉ gọi khi file đổi / chưa có trong cache
+        try:
+            st = os.stat(path)
+        except OSError:
+            return build(path)
+        key = (kind, os.path.relpath(path, self.root))
+        ent = self._entries.get(key)
+        if ent is not None and ent[0] == st.st_mtime_ns and ent[1] == st.st_size:
+            try:
+                value = pickle.loads(ent[2])
+                self.hits += 1
+                return value
+            except Exception:
+                pass
+        self.misses += 1
+        value = build(path)
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return value
+        with self._lock:
+            self._entries[key] = (st.st_mtime_ns, st.st_size, blob)
+            self._dirty = True
+        return value
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            # bỏ entry của file đã bị xoá
+            entries = {k: v for k, v in self._entries.items() if os.path.exists(os.path.join(self.root, k[1]))}
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    pickle.dump((CACHE_VERSION, self._stamp, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self.path)
+            except OSError:
+                return  # thư mục chỉ đọc: vẫn chạy, lần sau parse lại
+            self._entries = entries
+            self._dirty = False
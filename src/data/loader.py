@@ -1,18 +1,67 @@
-import os, glob, yaml
+import os, glob
 from typing import Dict, Any, List
 from .schema import (
     MapSpec, MapStationsCfg, PathSpec,
     LevelSpec, SpawnSpec, RobotDef
 )
 from src.engine.geometry import rescale_points, project_point_to_t, sample_path_t
+from engine.trace import traced
+from .cache import ConfigCache, parse_yaml
 
 def _read_yaml(path: str, default=None):
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f) or (default or {})
+        return parse_yaml(path) or (default or {})
     except Exception:
         return default or {}
 
+def _parse_map_file(path: str):
+    # 1 file configs/maps/*.yaml -> MapSpec (None nếu rỗng / lỗi)
+    d = _read_yaml(path, default={})
+    if not d:
+        return None
+    scfg = d.get("stations", {})
+    stations_cfg = MapStationsCfg(
+        preset = scfg.get("preset",""),
+        points = scfg.get("points",[]) or [],
+        add_points = scfg.get("add_points",[]) or [],
+        remove_indices = scfg.get("remove_indices",[]) or [],
+        generator = scfg.get("generator",{}) or {},
+    )
+    return MapSpec(
+        map_id=d.get("map_id","unknown"),
+        name=d.get("name","Unnamed"),
+        background=d.get("background",""),
+        conveyor=d.get("conveyor",{}),
+        decor=d.get("decor",{}),
+        paths=[PathSpec(points=p.get("points",[])) for p in d.get("paths",[])],
+        stations_cfg=stations_cfg,
+    )
+
+def _parse_levels_file(path: str) -> List[LevelSpec]:
+    # 1 file configs/levels/*.yaml -> list LevelSpec
+    levels: List[LevelSpec] = []
+    data = _read_yaml(path, default={})
+    for lvl in data.get("levels", []):
+        # Chuẩn hoá spawn->robots vào dataclass
+        spawn = lvl.get("spawn", {})
+        robots = []
+        for r in spawn.get("robots", []):
+            if isinstance(r, dict):
+                rtype = r.get("type")
+                weight = float(r.get("weight", 1.0))
+                params = dict(r); params.pop("type", None); params.pop("weight", None)
+                robots.append(RobotDef(type=rtype, weight=weight, params=params))
+        spawn_spec = SpawnSpec(interval=float(spawn.get("interval", 1.5)), robots=robots)
+        levels.append(LevelSpec(
+            level_id=lvl.get("level_id",""),
+            name=lvl.get("name",""),
+            map=lvl.get("map","straight"),
+            time=int(lvl.get("time", 120)),
+            goal=int(lvl.get("goal", 20)),
+            spawn=spawn_spec
+        ))
+    return levels
+
 class Loader:
     """
     Đọc toàn bộ config của game:
@@ -22,21 +71,39 @@ class Loader:
       - Levels                 -> configs/levels/*.yaml
       - I18N (ngôn ngữ)        -> configs/i18n/<lang>.yaml (+ merge với default)
     Ngoài ra cung cấp resolve_stations_for_path() để chuyển station 0..1 -> pixel & t.
+    Kết quả parse + chuẩn hoá từng file được cache trong cache_dir (data/cache.py),
+    cache_dir=None -> luôn parse lại.
     """
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, cache_dir: str = ""):
         self.base_dir = base_dir
         self.config_dir = os.path.join(base_dir, "configs")
         self._station_presets: Dict[str, List[List[float]]] = None
+        if cache_dir == "":
+            cache_dir = os.path.join(base_dir, ".cache", "config")
+        self.cache = ConfigCache(cache_dir, self.config_dir) if cache_dir else None
+
+    def _cached(self, kind, path, build):
+        if self.cache is None:
+            return build(path)
+        return self.cache.get(kind, path, build)
+
+    def save_cache(self):
+        if self.cache is not None:
+            self.cache.save()
 
     # ---------- Game config ----------
+    @traced(cat="loader")
     def load_game_config(self) -> Dict[str, Any]:
-        return _read_yaml(os.path.join(self.config_dir, "game.yaml"), default={
+        cfg = self._cached("yaml", os.path.join(self.config_dir, "game.yaml"), _read_yaml)
+        self.save_cache()
+        return cfg or {
             "game": {"title": "Rogue Factory", "resolution": [1280, 720], "target_fps": 60},
             "defaults": {"hp": 3, "robot_speed": 0.12},
             "language": {"default": "vi", "available": ["vi", "en"]}
-        })
+        }
 
     # ---------- Station presets ----------
+    @traced(cat="loader")
     def load_station_presets(self) -> Dict[str, List[List[float]]]:
         if self._station_presets is not None:
             return self._station_presets
@@ -44,42 +111,27 @@ class Loader:
         presets: Dict[str, List[List[float]]] = {}
         if os.path.isdir(presets_dir):
             for f in glob.glob(os.path.join(presets_dir, "*.yaml")):
-                d = _read_yaml(f, default={})
+                d = self._cached("yaml", f, _read_yaml)
                 pid = d.get("preset_id")
                 pts = d.get("points", [])
                 if pid and pts:
                     presets[pid] = pts  # list of [x, y] (0..1)
+            self.save_cache()
         self._station_presets = presets
         return presets
 
     # ---------- Maps ----------
+    @traced(cat="loader")
     def load_maps(self) -> Dict[str, MapSpec]:
         _ = self.load_station_presets()  # đảm bảo đã cache preset
         maps: Dict[str, MapSpec] = {}
         maps_dir = os.path.join(self.config_dir, "maps")
         if os.path.isdir(maps_dir):
             for f in glob.glob(os.path.join(maps_dir, "*.yaml")):
-                d = _read_yaml(f, default={})
-                if not d:
-                    continue
-                scfg = d.get("stations", {})
-                stations_cfg = MapStationsCfg(
-                    preset = scfg.get("preset",""),
-                    points = scfg.get("points",[]) or [],
-                    add_points = scfg.get("add_points",[]) or [],
-                    remove_indices = scfg.get("remove_indices",[]) or [],
-                    generator = scfg.get("generator",{}) or {},
-                )
-                m = MapSpec(
-                    map_id=d.get("map_id","unknown"),
-                    name=d.get("name","Unnamed"),
-                    background=d.get("background",""),
-                    conveyor=d.get("conveyor",{}),
-                    decor=d.get("decor",{}),
-                    paths=[PathSpec(points=p.get("points",[])) for p in d.get("paths",[])],
-                    stations_cfg=stations_cfg,
-                )
-                maps[m.map_id] = m
+                m = self._cached("map", f, _parse_map_file)
+                if m is not None:
+                    maps[m.map_id] = m
+            self.save_cache()
 
         # fallback nếu không có file map nào
         if not maps:
@@ -116,32 +168,15 @@ class Loader:
         return {"ts": station_ts}
 
     # ---------- Levels ----------
+    @traced(cat="loader")
     def load_levels(self) -> List[LevelSpec]:
         """Đọc tất cả các file levels trong configs/levels/*.yaml"""
         levels: List[LevelSpec] = []
         levels_dir = os.path.join(self.config_dir, "levels")
         if os.path.isdir(levels_dir):
             for f in glob.glob(os.path.join(levels_dir, "*.yaml")):
-                data = _read_yaml(f, default={})
-                for lvl in data.get("levels", []):
-                    # Chuẩn hoá spawn->robots vào dataclass
-                    spawn = lvl.get("spawn", {})
-                    robots = []
-                    for r in spawn.get("robots", []):
-                        if isinstance(r, dict):
-                            rtype = r.get("type")
-                            weight = float(r.get("weight", 1.0))
-                            params = dict(r); params.pop("type", None); params.pop("weight", None)
-                            robots.append(RobotDef(type=rtype, weight=weight, params=params))
-                    spawn_spec = SpawnSpec(interval=float(spawn.get("interval", 1.5)), robots=robots)
-                    levels.append(LevelSpec(
-                        level_id=lvl.get("level_id",""),
-                        name=lvl.get("name",""),
-                        map=lvl.get("map","straight"),
-                        time=int(lvl.get("time", 120)),
-                        goal=int(lvl.get("goal", 20)),
-                        spawn=spawn_spec
-                    ))
+                levels.extend(self._cached("levels", f, _parse_levels_file))
+            self.save_cache()
         # fallback nếu rỗng
         if not levels:
             levels.append(LevelSpec(
@@ -155,6 +190,7 @@ class Loader:
         return levels
 
     # ---------- I18N ----------
+    @traced(cat="loader")
     def load_i18n(self, lang_code: str) -> Dict[str, Any]:
         """
         Hợp nhất i18n theo thứ tự ưu tiên:
@@ -173,13 +209,14 @@ class Loader:
 
         # 1) default
         default_path = os.path.join(i18n_dir, "default.yaml")
-        merge_into(out, _read_yaml(default_path, default={}))
+        merge_into(out, self._cached("yaml", default_path, _read_yaml))
 
         # 2) en (nếu được gọi là en)
         if lang_code == "en":
-            merge_into(out, _read_yaml(os.path.join(i18n_dir, "en.yaml"), default={}))
+            merge_into(out, self._cached("yaml", os.path.join(i18n_dir, "en.yaml"), _read_yaml))
 
         # 3) lang cụ thể
-        merge_into(out, _read_yaml(os.path.join(i18n_dir, f"{lang_code}.yaml"), default={}))
+        merge_into(out, self._cached("yaml", os.path.join(i18n_dir, f"{lang_code}.yaml"), _read_yaml))
 
+        self.save_cache()
         return out
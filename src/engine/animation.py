@@ -0,0 +1,144 @@
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+# clip mặc định (ghi đè / bổ sung bằng mục `animations` trong game.yaml)
+#   sprite|vfx: key trong app.sprites / app.vfx, duration: giây mỗi frame,
+#   loop: lặp lại, next: clip phát tiếp khi clip không lặp chạy xong
+DEFAULT_ANIMATIONS = {
+    "OK":        {"sprite": "OK", "duration": 0.12, "loop": True},
+    "BAD_TRANS": {"sprite": "BAD_TRANS", "duration": 0.45, "loop": False, "next": "BAD_LOOP"},
+    "BAD_LOOP":  {"sprite": "BAD_LOOP", "duration": 0.18, "loop": True},
+    "BOOM":      {"vfx": "BOOM", "duration": 0.12, "loop": False},
+    "EFFECT":    {"vfx": "EFFECT", "duration": 0.06, "loop": False},
+}
+# VFX không khai báo trong animations vẫn có clip (không lặp)
+VFX_DURATION = 0.12
+
+
+def animation_defs(animations):
+    # DEFAULT_ANIMATIONS + mục `animations` trong game.yaml, key viết hoa
+    defs = {k: dict(v) for k, v in DEFAULT_ANIMATIONS.items()}
+    for name, d in (animations or {}).items():
+        defs.setdefault(str(name).upper(), {}).update(d or {})
+    return defs
+
+
+def clip_sources(defs, names):
+    # tên clip -> {("sprite" | "vfx", KEY)} ảnh cần để phát, theo cả chuỗi next
+    # (tên không khai báo = key VFX, như clip VFX tự sinh trong ClipLibrary.from_config)
+    out, todo, seen = set(), [str(n).upper() for n in names], set()
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        d = defs.get(name)
+        if d is None:
+            out.add(("vfx", name))
+            continue
+        if "vfx" in d:
+            out.add(("vfx", str(d["vfx"]).upper()))
+        else:
+            out.add(("sprite", str(d.get("sprite", name)).upper()))
+        if d.get("next"):
+            todo.append(str(d["next"]).upper())
+    return out
+
+
+@dataclass(frozen=True)
+class AnimationClip:
+    name: str
+    frames: Tuple[Any, ...]
+    duration: float = 0.12
+    loop: bool = True
+    next: Optional[str] = None
+
+    @property
+    def length(self) -> float:
+        return float(self.duration) * max(1, len(self.frames))
+
+    def index_at(self, elapsed: float) -> int:
+        n = len(self.frames)
+        i = int(elapsed / self.duration) if elapsed > 0 and self.duration > 0 else 0
+        return i % n if self.loop else min(i, n - 1)
+
+
+class ClipLibrary:
+    """
+    Clip dùng chung cho mọi robot: robot chỉ giữ tên clip + thời điểm bắt đầu,
+    frame được tính lười từ đồng hồ chung (app.sim_time) lúc vẽ.
+    """
+    def __init__(self, clips=(), vfx_names=()):
+        self._clips = {c.name: c for c in clips if c.frames}
+        self.vfx_names = [n for n in vfx_names if n in self._clips]
+
+    @classmethod
+    def from_config(cls, animations, sprites, vfx):
+        defs = animation_defs(animations)
+        clips, vfx_names, used_vfx = [], [], set()
+        for name, d in defs.items():
+            if "vfx" in d:
+                key = str(d["vfx"]).upper()
+                frames = vfx.get(key) or []
+                used_vfx.add(key)
+                vfx_names.append(name)
+            else:
+                frames = sprites.get(str(d.get("sprite", name)).upper()) or []
+            nxt = d.get("next")
+            clips.append(AnimationClip(name, tuple(frames), float(d.get("duration", 0.12)),
+                                       bool(d.get("loop", True)), str(nxt).upper() if nxt else None))
+        for key, frames in vfx.items():
+            if key not in used_vfx and key not in defs:
+                clips.append(AnimationClip(key, tuple(frames), VFX_DURATION, False))
+                vfx_names.append(key)
+        # thứ tự VFX dự phòng theo app.vfx (như code cũ: lấy list VFX đầu tiên)
+        order = {k: i for i, k in enumerate(vfx)}
+        vfx_names.sort(key=lambda n: order.get(n, len(order)))
+        return cls(clips, vfx_names)
+
+    def __contains__(self, name):
+        return name in self._clips
+
+    def __len__(self):
+        return len(self._clips)
+
+    def get(self, name) -> Optional[AnimationClip]:
+        return self._clips.get(name)
+
+    def vfx_clip(self, name) -> Optional[AnimationClip]:
+        # clip VFX theo tên, không có -> VFX đầu tiên có frame
+        clip = self._clips.get(name)
+        if clip is None and self.vfx_names:
+            clip = self._clips[self.vfx_names[0]]
+        return clip
+
+    def resolve(self, name, elapsed: float):
+        # -> (clip, frame_index) sau khi đi theo chuỗi next; None nếu không có clip
+        clip = self._clips.get(name)
+        if clip is None:
+            return None
+        while not clip.loop and clip.next and elapsed >= clip.length:
+            nxt = self._clips.get(clip.next)
+            if nxt is None:
+                break
+            elapsed -= clip.length
+            clip = nxt
+        return clip, clip.index_at(elapsed)
+
+    def frame(self, name, elapsed: float):
+        res = self.resolve(name, elapsed)
+        if res is None:
+            return None
+        clip, i = res
+        return clip.frames[i]
+
+    def initial_clip(self, type_name, start_transition=False):
+        # RobotBase: robot mới đột biến -> BAD_TRANS; còn lại theo tên loại (OK / BAD)
+        if start_transition and "BAD_TRANS" in self._clips:
+            return "BAD_TRANS"
+        key = type_name.upper()
+        if "OK" in key and "OK" in self._clips:
+            return "OK"
+        if "BAD" in key and "BAD_LOOP" in self._clips:
+            return "BAD_LOOP"
+        return None
@@ -3,18 +3,125 @@ import os, pygame
 
 from engine.audio import Audio
 from .state import State
+from .text import TextRenderer
+from .assets import AssetCache, AssetManager, sprite_manifest, vfx_manifest
+from .atlas import SpriteAtlas
+from .animation import ClipLibrary, animation_defs, clip_sources
+from .profiler import FrameProfiler
+from . import startup, trace
 from data.loader import Loader
 from states.boot import BootState
 
 class GameApp:
-    def __init__(self, base_dir):
-        pygame.init()
+    @trace.traced("GameApp.__init__", cat="startup")
+    def __init__(self, base_dir, headless=False, load_assets=None, async_boot=False):
+        # load_assets: decode sprite/VFX (mặc định: trừ khi headless); replay headless cần VFX như phiên gốc
+        # async_boot: BootState load config/asset trên thread pool, vẽ thanh tiến trình trong run();
+        #             False -> load xong ngay trong __init__ (headless, benchmark, script)
+        self.headless = headless
+        if load_assets is None:
+            load_assets = not headless
+        self.load_assets = load_assets
+        self.async_boot = async_boot
+        if headless:
+            # no window / no sound card: SDL dummy drivers
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        # chỉ display (+ event) chặn frame đầu; mixer init trên boot pipeline (open_audio),
+        # font init + tra font hệ thống lười (font / big_font)
+        with startup.phase("pygame.display"):
+            pygame.display.init()
         self.base_dir = base_dir
         self.loader = Loader(base_dir)
-        self.config = self.loader.load_game_config()
+        with startup.phase("config"):
+            self.config = self.loader.load_game_config()
+        self.audio = None
 
-        ##! INIT AUDIO
-        sfx_dir = os.path.join(base_dir, "assets", "sounds", "SFX")
+        W, H = self.config.get("game", {}).get("resolution", [1280, 720])
+        with startup.phase("window"):
+            self.screen = pygame.display.set_mode((W, H))
+            pygame.display.set_caption(self.config.get("game", {}).get("title", "Rogue Factory"))
+
+        self.clock = pygame.time.Clock()
+        self.fps = self.config.get("game", {}).get("target_fps", 60)
+        # mô phỏng bước cố định (độc lập FPS), tối đa max_catchup_steps bước mỗi frame khi bị trễ
+        self.fixed_dt = 1.0 / float(self.config.get("game", {}).get("sim_hz", 60))
+        self.max_catchup_steps = int(self.config.get("game", {}).get("max_catchup_steps", 5))
+        # vị trí giữa 2 bước mô phỏng để nội suy khi vẽ (0 = bước trước, 1 = bước hiện tại)
+        self.frame_alpha = 1.0
+        # dirty-rect mode: chỉ đẩy lên màn hình vùng state báo đã đổi (State.dirty_rects)
+        self.dirty_rects = bool(self.config.get("game", {}).get("dirty_rects", False))
+        # tổng diện tích dirty > tỉ lệ này * màn hình -> flip() cả màn cho rẻ hơn
+        self.dirty_full_ratio = float(self.config.get("game", {}).get("dirty_full_ratio", 0.5))
+        self._fonts = None
+        # chữ HUD: glyph atlas + LRU chuỗi đã render (engine/text.py)
+        self.text = TextRenderer()
+        # đo thời gian từng phần của frame, F3 bật/tắt overlay (engine/profiler.py)
+        dbg = self.config.get("debug", {}) or {}
+        self.profiler = None
+        if dbg.get("profiler", True) and not headless:
+            self.profiler = FrameProfiler(int(dbg.get("profiler_frames", 240)), budget_ms=1000.0 / max(1, self.fps))
+            self.profiler.visible = bool(dbg.get("profiler_visible", False))
+
+
+        #! --- SPRITES / VFX: decode trong BootState (submit_assets); headless trừ khi load_assets ---
+        # app.sprites / app.vfx = các key đang nằm trong bộ nhớ (refresh_assets), state giữ key
+        # cần dùng qua asset_manager.acquire(), phần còn lại load lười / bị evict khi state exit
+        self.sprites = {}
+        self.vfx = {}
+        self.assets = self._asset_cache() if load_assets else None
+        self.asset_manager = None
+        if self.assets is not None:
+            acfg = self.config.get("assets", {}) or {}
+            self.asset_manager = AssetManager(self.assets,
+                                              sprite_manifest(self.base_dir, self.config),
+                                              vfx_manifest(self.base_dir, self.config),
+                                              budget_bytes=float(acfg.get("memory_budget_mb", 128)) * (1 << 20))
+        self._assets_generation = -1
+        self.atlas = None
+        # clip animation dùng chung (animations trong game.yaml) + đồng hồ chung của gameplay
+        self.clips = ClipLibrary.from_config(self.config.get("animations"), self.sprites, self.vfx)
+        self.sim_time = 0.0
+
+        self.state_stack = []
+        self.running = True
+
+        # Push Boot state
+        self.push_state(BootState(self))
+
+    # ---------- font: SysFont quét font hệ thống (chậm) -> chỉ làm khi cần lần đầu ----------
+    @property
+    def font(self):
+        if self._fonts is None:
+            self._load_fonts()
+        return self._fonts[0]
+
+    @property
+    def big_font(self):
+        if self._fonts is None:
+            self._load_fonts()
+        return self._fonts[1]
+
+    @property
+    def fonts_ready(self):
+        return self._fonts is not None
+
+    def _load_fonts(self):
+        with startup.phase("fonts"):
+            pygame.font.init()
+            self._fonts = (pygame.font.SysFont("arialrounded", 24), pygame.font.SysFont("arialrounded", 48))
+
+    def submit_fonts(self, pipe):
+        # quét danh sách font hệ thống trên worker, tạo Font ở thread chính (headless: lười khi cần)
+        if self._fonts is None and not self.headless:
+            pipe.submit("font lookup", pygame.font.get_fonts, then=lambda _: self.font)
+
+    # ---------- audio ----------
+    def open_audio(self):
+        # mixer init + Audio, chạy được trên worker (boot pipeline); headless / lỗi -> None
+        if self.headless:
+            return None
+        sfx_dir = os.path.join(self.base_dir, "assets", "sounds", "SFX")
         sfx_map = {}
         if os.path.isdir(sfx_dir):
             for f in glob.glob(os.path.join(sfx_dir, "*")):
@@ -22,132 +129,89 @@ class GameApp:
                    key = os.path.splitext(os.path.basename(f))[0].upper()
                    sfx_map[key] = f
         #!VOLUME
-        music_vol = float(self.config.get("audio", {}).get("music_volume", 0.1))
+        acfg = self.config.get("audio", {}) or {}
+        music_vol = float(acfg.get("music_volume", 0.1))
+        # PCM đã decode trên đĩa (engine/audio.py); audio.cache_dir rỗng -> decode MP3 mỗi lần chạy
+        pcm_dir = acfg.get("cache_dir", ".cache/audio")
+        if pcm_dir and not os.path.isabs(pcm_dir):
+            pcm_dir = os.path.join(self.base_dir, pcm_dir)
         try:
-            self.audio = Audio(sfx_map=sfx_map, music_volume=music_vol)
+            pygame.mixer.init()
+            # SFX trong audio.preload decode trên boot pipeline (submit_sfx), còn lại lúc play lần đầu
+            return Audio(sfx_map=sfx_map, music_volume=music_vol, preload=False,
+                         cache_dir=pcm_dir or None, channels=acfg.get("channels", 16),
+                         rules=acfg.get("sfx"))
         except Exception:
-            self.audio = None
+            return None
 
-        W, H = self.config.get("game", {}).get("resolution", [1280, 720])
-        self.screen = pygame.display.set_mode((W, H))
-        pygame.display.set_caption(self.config.get("game", {}).get("title", "Rogue Factory"))
+    @trace.traced(cat="startup")
+    def _asset_cache(self):
+        # ảnh đã scale sẵn trên đĩa (engine/assets.py); assets.cache_dir rỗng -> tắt cache đĩa
+        cache_dir = (self.config.get("assets", {}) or {}).get("cache_dir", ".cache/assets")
+        if cache_dir and not os.path.isabs(cache_dir):
+            cache_dir = os.path.join(self.base_dir, cache_dir)
+        return AssetCache(cache_dir or None)
 
-        self.clock = pygame.time.Clock()
-        self.fps = self.config.get("game", {}).get("target_fps", 60)
-        self.font = pygame.font.SysFont("arialrounded", 24)
-        self.big_font = pygame.font.SysFont("arialrounded", 48)
+    def preload_keys(self):
+        # assets.preload trong game.yaml (list KEY), mặc định: mọi ảnh mà animations tham chiếu
+        m = self.asset_manager
+        names = (self.config.get("assets", {}) or {}).get("preload")
+        if names is None:
+            defs = animation_defs(self.config.get("animations"))
+            return [k for k in m.manifest if k in clip_sources(defs, defs)]
+        names = {str(n).upper() for n in names}
+        return [k for k in m.manifest if k[1] in names]
 
+    def submit_assets(self, pipe):
+        # decode trước (preload) trên pipeline (engine/boot.py), convert_alpha ở thread chính;
+        # key khác load lười khi có state acquire
+        m = self.asset_manager
+        if m is None:
+            return
+        keys = self.preload_keys()
+        for kind, phase in (("sprite", "sprites"), ("vfx", "vfx")):
+            for path, scale in m.entries(k for k in keys if k[0] == kind):
+                pipe.submit(f"decode {os.path.basename(path)}", self.assets.read, path, scale, phase=phase,
+                            then=lambda res, p=path, s=scale: m.adopt(p, s, res))
+        pipe.submit("sprites", None, phase="atlas", then=lambda _: self.refresh_assets())
 
-        #! --- LOAD SPRITES / APPLY CONFIGURED SCALES ---
-        self.sprites = {}
-        sprites_cfg = self.config.get("sprites", {})  # expected keys uppercase -> value: float(scale) or [w,h]
-        sprites_root = os.path.join(base_dir, "assets", "images", "robot")
-        def _load(p):
-            try:
-                return pygame.image.load(p).convert_alpha()
-            except Exception:
-                return None
-
-        def _apply_scale(img, scale_val):
-            if img is None or scale_val is None:
-                return img
-            try:
-                if isinstance(scale_val, (int, float)):
-                    w = max(1, int(img.get_width() * float(scale_val)))
-                    h = max(1, int(img.get_height() * float(scale_val)))
-                elif isinstance(scale_val, (list, tuple)) and len(scale_val) == 2:
-                    w = int(scale_val[0]); h = int(scale_val[1])
-                else:
-                    return img
-                return pygame.transform.smoothscale(img, (w, h))
-            except Exception:
-                return img
-
-        if os.path.isdir(sprites_root):
-            ok_path = os.path.join(sprites_root, "anim0a.png")
-            if os.path.isfile(ok_path):
-                img = _load(ok_path)
-                if img:
-                    key = "OK"
-                    img = _apply_scale(img, sprites_cfg.get(key))
-                    self.sprites[key] = [img]
-
-            bad_trans_paths = [os.path.join(sprites_root, n) for n in ("anim2.png", "anim3.png", "anim4.png")]
-            bad_trans = []
-            for p in bad_trans_paths:
-                if os.path.isfile(p):
-                    img = _load(p)
-                    if img:
-                        # apply same scale for BAD_TRANS if configured under BAD_TRANS else BAD_LOOP else None
-                        img = _apply_scale(img, sprites_cfg.get("BAD_TRANS") or sprites_cfg.get("BAD_LOOP"))
-                        bad_trans.append(img)
-            bad_trans = [f for f in bad_trans if f]
-            if bad_trans:
-                self.sprites["BAD_TRANS"] = bad_trans
-
-            bad_loop_paths = [os.path.join(sprites_root, n) for n in ("anim3.png", "anim4.png")]
-            bad_loop = []
-            for p in bad_loop_paths:
-                if os.path.isfile(p):
-                    img = _load(p)
-                    if img:
-                        img = _apply_scale(img, sprites_cfg.get("BAD_LOOP"))
-                        bad_loop.append(img)
-            bad_loop = [f for f in bad_loop if f]
-            if bad_loop:
-                self.sprites["BAD_LOOP"] = bad_loop
-
-        #LOAD VFX
-        vfx_cfg = self.config.get("vfx", {}) or {}
-        self.vfx = {}
-        vfx_root = os.path.join(base_dir, "assets", "images", "VFX")
-        def _load(p):
-            try:
-                return pygame.image.load(p).convert_alpha()
-            except Exception:
-                return None
-        def _apply_scale(img, scale_val):
-            if img is None or scale_val is None:
-                return img
-            try:
-                if isinstance(scale_val, (int, float)):
-                    w = max(1, int(img.get_width() * float(scale_val)))
-                    h = max(1, int(img.get_height() * float(scale_val)))
-                elif isinstance(scale_val, (list, tuple)) and len(scale_val) == 2:
-                    w = int(scale_val[0]); h = int(scale_val[1])
-                else:
-                    return img
-                return pygame.transform.smoothscale(img, (w, h))
-            except Exception:
-                return img
-
-        if os.path.isdir(vfx_root):
-            import re
-            files = sorted([f for f in glob.glob(os.path.join(vfx_root, "*")) if os.path.isfile(f)])
-            groups = {}
-            for f in files:
-                name = os.path.splitext(os.path.basename(f))[0]
-                m = re.match(r"^([A-Za-z0-9]+?)(?:[_\-](\d+))?$", name)
-                base = (m.group(1) if m else name).upper()
-                idx = int(m.group(2)) if (m and m.group(2)) else 0
-                groups.setdefault(base, []).append((idx, f))
-            for key, items in groups.items():
-                items.sort(key=lambda x: x[0])
-                frames = []
-                scale_val = vfx_cfg.get(key)
-                for _, path in items:
-                    img = _load(path)
-                    if not img: continue
-                    img = _apply_scale(img, scale_val)
-                    frames.append(img)
-                if frames:
-                    self.vfx[key] = frames
+    def refresh_assets(self):
+        # dựng lại app.sprites / app.vfx / atlas / clips khi tập ảnh trong bộ nhớ đổi
+        m = self.asset_manager
+        if m is None or m.generation == self._assets_generation:
+            return
+        self._assets_generation = m.generation
+        self.assets.save_index()
+        self.sprites = m.resident("sprite")
+        self.vfx = m.resident("vfx")
+        # mọi frame robot + VFX trong vài sheet -> vẽ robot bằng 1 lần Surface.blits
+        self.atlas = SpriteAtlas.build(self.sprites, self.vfx)
+        self.clips = ClipLibrary.from_config(self.config.get("animations"), self.sprites, self.vfx)
 
-        self.state_stack = []
-        self.running = True
+    def acquire_assets(self, owner, clip_names):
+        # state giữ ảnh của các clip cần dùng (load nếu chưa có) tới khi bị pop
+        m = self.asset_manager
+        if m is None:
+            return
+        defs = animation_defs(self.config.get("animations"))
+        items = clip_sources(defs, clip_names)
+        # ClipLibrary.vfx_clip dự phòng VFX đầu tiên khi thiếu clip VFX
+        vfx = m.keys("vfx")
+        if vfx and any(i not in m.manifest for i in items if i[0] == "vfx"):
+            items.add(("vfx", vfx[0]))
+        m.acquire(owner, items)
+        self.refresh_assets()
 
-        # Push Boot state
-        self.push_state(BootState(self))
+    def submit_sfx(self, pipe):
+        # audio.preload: list KEY decode sẵn lúc boot (null = mọi SFX)
+        if self.audio is None:
+            return
+        names = (self.config.get("audio", {}) or {}).get("preload")
+        names = None if names is None else {str(n).upper() for n in names}
+        for key, path in self.audio.sfx_paths.items():
+            if key not in self.audio.sfx and (names is None or key in names):
+                pipe.submit(f"sfx {key}", self.audio.decode, path, phase="sfx",
+                            then=lambda snd, k=key: self.audio.adopt(k, snd))
 
     def push_state(self, st: State, **kwargs):
         self.state_stack.append(st)
@@ -157,23 +221,98 @@ class GameApp:
         if self.state_stack:
             top = self.state_stack.pop()
             top.exit()
+            if self.asset_manager is not None:
+                # ảnh state này giữ hết được giữ -> evict LRU nếu vượt budget
+                self.asset_manager.release(top)
+                if self.asset_manager.evict():
+                    self.refresh_assets()
 
     def switch_state(self, st: State, **kwargs):
         self.pop_state()
         self.push_state(st, **kwargs)
 
+    def close_states(self):
+        # thoát mọi state còn trên stack (GameplayState đóng file replay + ghi END) trước pygame.quit;
+        # không evict / dựng lại atlas như pop_state vì app sắp tắt
+        while self.state_stack:
+            self.state_stack.pop().exit()
+
     def current_state(self):
         return self.state_stack[-1] if self.state_stack else None
 
     def run(self):
+        step = self.fixed_dt
+        acc = 0.0
+        prof = self.profiler
+        tracing = trace.ENABLED  # trace tắt: không gọi gì thêm trong vòng lặp
         while self.running and self.current_state():
-            dt = self.clock.tick(self.fps) / 1000.0
+            if tracing: trace.begin("frame", "app")
+            if prof: prof.begin()
+            with trace.span("wait", "app"):
+                acc += self.clock.tick(self.fps) / 1000.0
+            if prof: prof.mark(0)  # wait
             for e in pygame.event.get():
                 if e.type == pygame.QUIT:
                     self.running = False
+                elif prof and e.type == pygame.KEYDOWN and e.key == pygame.K_F3:
+                    prof.toggle()
+                    self.current_state().invalidate()  # xoá overlay cũ khỏi màn hình
                 else:
                     self.current_state().handle_event(e)
-            self.current_state().update(dt)
-            self.current_state().draw(self.screen)
-            pygame.display.flip()
+            if prof: prof.mark(1)  # events
+            # accumulator: update luôn với dt cố định, bù frame chậm bằng nhiều bước (có giới hạn)
+            steps = 0
+            while acc >= step and steps < self.max_catchup_steps and self.current_state():
+                self.current_state().update(step)
+                acc -= step
+                steps += 1
+                if prof: prof.step()
+            if tracing and steps != 1:
+                trace.instant("catchup" if steps else "no_update", "app", steps=steps)
+            if acc >= step:
+                acc = acc % step  # quá tải: bỏ phần trễ còn lại thay vì dồn mãi (game chậm lại)
+            self.frame_alpha = acc / step
+            if self.audio is not None:
+                self.audio.flush()  # SFX trigger trong các bước update vừa chạy
+            if prof: prof.mark(2)  # update
+            st = self.current_state()
+            if not st:
+                if tracing: trace.end("frame", "app")
+                break
+            st.draw(self.screen)
+            counters = st.debug_counters() if prof or tracing else None
+            if prof and prof.visible:
+                prof.draw(self.screen, counters, getattr(self, "robot_pool", None))
+            if prof: prof.mark(3)  # draw
+            with trace.span("present", "app"):
+                self.present(st)
+            if prof:
+                prof.mark(4)  # present
+                prof.end(counters)
+            if tracing:
+                if counters:
+                    trace.counter("robots", count=counters.get("robots", 0))
+                trace.end("frame", "app")
+            # --profile-startup: in báo cáo khi frame đầu tiên sau màn boot lên màn hình rồi thoát
+            if startup.ENABLED and startup.first_frame(type(st).__name__) and not isinstance(st, BootState):
+                startup.report()
+                self.running = False
+        # đóng cửa sổ / QUIT ở menu: state vẫn phải exit() như khi chuyển state
+        self.close_states()
+        if prof:
+            prof.close()
+        trace.close()
         pygame.quit()
+
+    def present(self, st):
+        # overlay profiler đè lên frame -> đẩy cả màn hình
+        visible = self.profiler is not None and self.profiler.visible
+        rects = st.dirty_rects() if self.dirty_rects and not visible else None
+        if rects is None:
+            pygame.display.flip()
+            return
+        W, H = self.screen.get_size()
+        if sum(r.w * r.h for r in rects) > self.dirty_full_ratio * W * H:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
@@ -0,0 +1,341 @@
+import glob, hashlib, json, os, re, struct
+from collections import OrderedDict
+
+import pygame
+
+from .trace import traced
+
+# file cache: header (magic, w, h) + RGBA thô -> load không cần decode PNG / smoothscale
+CACHE_MAGIC = b"RFA1"
+_HEADER = struct.Struct("<4sII")
+
+
+def apply_scale(img, scale_val):
+    # scale_val: float (tỉ lệ) | [w, h] | None (giữ nguyên)
+    if img is None or scale_val is None:
+        return img
+    try:
+        if isinstance(scale_val, (int, float)):
+            w = max(1, int(img.get_width() * float(scale_val)))
+            h = max(1, int(img.get_height() * float(scale_val)))
+        elif isinstance(scale_val, (list, tuple)) and len(scale_val) == 2:
+            w = int(scale_val[0]); h = int(scale_val[1])
+        else:
+            return img
+        return pygame.transform.smoothscale(img, (w, h))
+    except Exception:
+        return img
+
+
+def _convert(img):
+    # convert_alpha cần display mode đã set (build_assets.py chạy không cửa sổ)
+    try:
+        return img.convert_alpha()
+    except pygame.error:
+        return img
+
+
+def sprite_manifest(base_dir, config):
+    # key sprite -> [(path, scale)] theo đúng thứ tự frame (giống GameApp cũ)
+    sprites_cfg = config.get("sprites", {}) or {}
+    root = os.path.join(base_dir, "assets", "images", "robot")
+    if not os.path.isdir(root):
+        return {}
+    def files(names, scale):
+        return [(os.path.join(root, n), scale) for n in names if os.path.isfile(os.path.join(root, n))]
+    out = {
+        "OK": files(("anim0a.png",), sprites_cfg.get("OK")),
+        # BAD_TRANS dùng scale BAD_TRANS, không có thì BAD_LOOP
+        "BAD_TRANS": files(("anim2.png", "anim3.png", "anim4.png"),
+                           sprites_cfg.get("BAD_TRANS") or sprites_cfg.get("BAD_LOOP")),
+        "BAD_LOOP": files(("anim3.png", "anim4.png"), sprites_cfg.get("BAD_LOOP")),
+    }
+    return {k: v for k, v in out.items() if v}
+
+
+def vfx_manifest(base_dir, config):
+    # VFX/<Name>[_<idx>].png -> key NAME, frame sắp theo idx
+    vfx_cfg = config.get("vfx", {}) or {}
+    root = os.path.join(base_dir, "assets", "images", "VFX")
+    if not os.path.isdir(root):
+        return {}
+    groups = {}
+    for f in sorted(f for f in glob.glob(os.path.join(root, "*")) if os.path.isfile(f)):
+        name = os.path.splitext(os.path.basename(f))[0]
+        m = re.match(r"^([A-Za-z0-9]+?)(?:[_\-](\d+))?$", name)
+        base = (m.group(1) if m else name).upper()
+        idx = int(m.group(2)) if (m and m.group(2)) else 0
+        groups.setdefault(base, []).append((idx, f))
+    out = {}
+    for key, items in groups.items():
+        items.sort(key=lambda x: x[0])
+        out[key] = [(path, vfx_cfg.get(key)) for _, path in items]
+    return out
+
+
+class AssetCache:
+    """
+    Ảnh đã scale sẵn, lưu trên đĩa tại cache_dir (mặc định .cache/assets).
+    Key = sha1 nội dung file gốc + scale config, nên đổi ảnh hoặc đổi sprites/vfx
+    trong game.yaml sẽ tự sinh entry mới. Trong 1 phiên, (path, scale) giống nhau
+    chỉ load 1 lần (anim3/anim4 dùng chung cho BAD_TRANS và BAD_LOOP).
+    cache_dir=None -> không dùng đĩa, chỉ dedupe trong bộ nhớ.
+    """
+    INDEX = "index.json"
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self._memo = {}
+        self._index = {}    # path -> [mtime_ns, size, sha1] (khỏi hash lại file không đổi)
+        self._index_dirty = False
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            try:
+                with open(os.path.join(cache_dir, self.INDEX), "r", encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+
+    # ---------- key ----------
+    def source_hash(self, path):
+        st = os.stat(path)
+        ent = self._index.get(path)
+        if ent and ent[0] == st.st_mtime_ns and ent[1] == st.st_size:
+            return ent[2]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._index[path] = [st.st_mtime_ns, st.st_size, digest]
+        self._index_dirty = True
+        return digest
+
+    def cache_path(self, path, scale):
+        tag = hashlib.sha1(repr(scale).encode("utf-8")).hexdigest()[:8]
+        return os.path.join(self.cache_dir, f"{self.source_hash(path)[:20]}_{tag}.rgba")
+
+    # ---------- load ----------
+    @traced(cat="assets")
+    def load(self, path, scale=None):
+        key = (path, repr(scale))
+        if key in self._memo:
+            return self._memo[key]
+        return self.adopt(path, scale, self.read(path, scale))
+
+    def read(self, path, scale=None):
+        """
+        Phần nặng của load(), chạy được trên thread khác (boot pipeline): đọc cache đĩa
+        hoặc decode PNG + smoothscale + ghi cache. Chưa convert_alpha (cần thread chính).
+        -> (img | None, from_cache, scaled)
+        """
+        img = self._read_cached(path, scale) if self.cache_dir else None
+        if img is not None:
+            return img, True, True
+        try:
+            img = pygame.image.load(path)
+        except Exception:
+            return None, False, False
+        if img.get_bitsize() != 32:
+            return img, False, False  # smoothscale cần 24/32 bit -> scale sau khi convert
+        # convert_alpha không đổi giá trị pixel RGBA 32 bit -> scale trước cũng ra cùng ảnh
+        img = apply_scale(img, scale)
+        if self.cache_dir:
+            self._write(path, scale, img)
+        return img, False, True
+
+    def adopt(self, path, scale, result):
+        # thread chính: convert_alpha kết quả read() và nhớ theo (path, scale)
+        img, from_cache, scaled = result
+        if img is not None:
+            img = _convert(img)
+            if not scaled:
+                img = apply_scale(img, scale)
+                if self.cache_dir:
+                    self._write(path, scale, img)
+            if from_cache:
+                self.hits += 1
+            else:
+                self.misses += 1
+        self._memo[(path, repr(scale))] = img
+        return img
+
+    def _read_cached(self, path, scale):
+        try:
+            with open(self.cache_path(path, scale), "rb") as f:
+                data = f.read()
+            magic, w, h = _HEADER.unpack_from(data)
+            if magic != CACHE_MAGIC or len(data) != _HEADER.size + w * h * 4:
+                return None
+            return pygame.image.frombytes(data[_HEADER.size:], (w, h), "RGBA")
+        except (OSError, struct.error, ValueError):
+            return None
+
+    def _write(self, path, scale, img):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            out = self.cache_path(path, scale)
+            tmp = out + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(CACHE_MAGIC, img.get_width(), img.get_height()))
+                f.write(pygame.image.tobytes(img, "RGBA"))
+            os.replace(tmp, out)
+        except OSError:
+            pass
+
+    def loaded(self, path, scale=None):
+        return (path, repr(scale)) in self._memo
+
+    def forget(self, path, scale=None):
+        # bỏ ảnh khỏi bộ nhớ (AssetManager.evict); lần load sau đọc lại từ cache đĩa
+        self._memo.pop((path, repr(scale)), None)
+
+    @traced(cat="assets")
+    def load_group(self, entries):
+        # [(path, scale)] -> list Surface (bỏ file lỗi)
+        return [img for img in (self.load(p, s) for p, s in entries) if img is not None]
+
+    def save_index(self):
+        if not (self.cache_dir and self._index_dirty):
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = os.path.join(self.cache_dir, self.INDEX + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp, os.path.join(self.cache_dir, self.INDEX))
+            self._index_dirty = False
+        except OSError:
+            pass
+
+
+def surface_bytes(img):
+    return img.get_width() * img.get_height() * img.get_bytesize() if img is not None else 0
+
+
+class AssetManager:
+    """
+    Sprite / VFX theo key ("sprite" | "vfx", KEY), load lười lần đầu dùng qua AssetCache
+    (1 Surface cho mỗi (path, scale), frame trùng giữa các key dùng chung).
+    State giữ key bằng acquire(state, items) / release(state); GameApp.pop_state gọi
+    release + evict(): ảnh không ai giữ bị bỏ theo LRU tới khi tổng bộ nhớ <= budget_bytes.
+    """
+    KINDS = ("sprite", "vfx")
+
+    def __init__(self, cache, sprites=None, vfx=None, budget_bytes=128 << 20):
+        self.cache = cache
+        self.budget_bytes = int(budget_bytes)
+        # (kind, KEY) -> [(path, scale)] theo thứ tự manifest
+        self.manifest = OrderedDict()
+        for kind, groups in (("sprite", sprites or {}), ("vfx", vfx or {})):
+            for key, entries in groups.items():
+                self.manifest[(kind, key)] = list(entries)
+        self._lru = OrderedDict()   # (path, repr(scale)) -> (bytes, path, scale), dùng gần nhất ở cuối
+        self._refs = {}             # owner -> set (kind, KEY)
+        self.generation = 0         # tăng mỗi khi tập ảnh trong bộ nhớ đổi (GameApp.refresh_assets)
+        self.loads = 0
+        self.evictions = 0
+
+    def keys(self, kind):
+        return [k for (kd, k) in self.manifest if kd == kind]
+
+    def entries(self, items):
+        # (kind, KEY) -> các (path, scale) không trùng, theo thứ tự manifest
+        out, seen = [], set()
+        for item in items:
+            for path, scale in self.manifest.get(item, ()):
+                if (path, repr(scale)) not in seen:
+                    seen.add((path, repr(scale)))
+                    out.append((path, scale))
+        return out
+
+    # ---------- load ----------
+    def adopt(self, path, scale, result):
+        # kết quả AssetCache.read() từ boot pipeline -> convert + ghi nhận như load()
+        img = self.cache.adopt(path, scale, result)
+        self._touch(path, scale, img, new=True)
+        return img
+
+    def load(self, path, scale=None):
+        new = not self.cache.loaded(path, scale)
+        img = self.cache.load(path, scale)
+        self._touch(path, scale, img, new)
+        return img
+
+    def _touch(self, path, scale, img, new):
+        key = (path, repr(scale))
+        if key in self._lru:
+            self._lru.move_to_end(key)
+        else:
+            self._lru[key] = (surface_bytes(img), path, scale)
+        if new:
+            self.loads += 1
+            self.generation += 1
+
+    def frames(self, kind, key):
+        # list Surface của 1 key (load nếu chưa có), [] nếu key không có trong manifest
+        imgs = (self.load(p, s) for p, s in self.manifest.get((kind, key), ()))
+        return [img for img in imgs if img is not None]
+
+    def resident(self, kind):
+        # key -> frames cho mọi key đã load đủ (không load thêm), theo thứ tự manifest
+        out = {}
+        for (kd, key), entries in self.manifest.items():
+            if kd != kind or not entries or not all(self.cache.loaded(p, s) for p, s in entries):
+                continue
+            frames = [img for img in self.cache.load_group(entries) if img is not None]
+            if frames:
+                out[key] = frames
+        return out
+
+    # ---------- tham chiếu ----------
+    def acquire(self, owner, items):
+        items = [i for i in items if i in self.manifest]
+        self._refs.setdefault(owner, set()).update(items)
+        for kind, key in items:
+            self.frames(kind, key)
+
+    def release(self, owner):
+        self._refs.pop(owner, None)
+
+    def pinned(self):
+        held = set()
+        for items in self._refs.values():
+            held.update(items)
+        return {(p, repr(s)) for p, s in self.entries(held)}
+
+    # ---------- bộ nhớ ----------
+    def used_bytes(self):
+        return sum(v[0] for v in self._lru.values())
+
+    def evict(self, budget_bytes=None):
+        budget = self.budget_bytes if budget_bytes is None else int(budget_bytes)
+        used = self.used_bytes()
+        if used <= budget:
+            return 0
+        pinned = self.pinned()
+        n = 0
+        for key in list(self._lru):
+            if used <= budget:
+                break
+            if key in pinned:
+                continue
+            nbytes, path, scale = self._lru.pop(key)
+            self.cache.forget(path, scale)
+            used -= nbytes
+            n += 1
+        if n:
+            self.evictions += n
+            self.generation += 1
+        return n
+
+    def stats(self):
+        return {
+            "resident": len(self._lru),
+            "bytes": self.used_bytes(),
+            "budget": self.budget_bytes,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "owners": len(self._refs),
+        }
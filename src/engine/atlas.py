@@ -0,0 +1,94 @@
+import pygame
+
+from .trace import traced
+
+
+class SpriteAtlas:
+    """
+    Gom frame sprite/VFX vào vài sheet lớn (xếp theo hàng - shelf packing), mỗi frame
+    nhớ (sheet, vùng nguồn). Nhờ vậy cả lớp robot được vẽ bằng 1 lần Surface.blits
+    với (sheet, dest, area) thay vì mỗi robot 1 lần blit từ Surface riêng.
+    Frame gốc vẫn giữ nguyên (app.sprites / app.vfx), atlas chỉ tra theo id(frame).
+    """
+    def __init__(self, max_size=2048, padding=1):
+        self.max_size = int(max_size)
+        self.padding = int(padding)
+        self.sheets = []
+        self._regions = {}   # id(frame) -> (sheet, Rect)
+        self._frames = []    # giữ tham chiếu để id() không bị tái sử dụng
+
+    @classmethod
+    @traced("SpriteAtlas.build", cat="assets")
+    def build(cls, *groups, **kwargs):
+        # groups: các dict key -> list Surface (vd. app.sprites, app.vfx)
+        atlas = cls(**kwargs)
+        frames = []
+        for g in groups:
+            for key in sorted(g):
+                frames.extend(f for f in g[key] if isinstance(f, pygame.Surface))
+        atlas.pack(frames)
+        return atlas
+
+    def __len__(self):
+        return len(self._regions)
+
+    def __contains__(self, frame):
+        return id(frame) in self._regions
+
+    def pack(self, frames):
+        pad = self.padding
+        todo = []
+        seen = set(self._regions)
+        for f in frames:
+            if id(f) in seen:
+                continue  # frame dùng chung (anim3/anim4 cho BAD_TRANS và BAD_LOOP)
+            seen.add(id(f))
+            w, h = f.get_size()
+            if w + pad > self.max_size or h + pad > self.max_size:
+                continue  # quá lớn, để blit thẳng từ Surface gốc
+            todo.append(f)
+        # cao trước -> các hàng đều hơn
+        todo.sort(key=lambda f: (-f.get_height(), -f.get_width()))
+
+        while todo:
+            placed, rest = [], []
+            x = y = row_h = 0
+            used_w = used_h = 0
+            for f in todo:
+                w, h = f.get_size()
+                if x + w > self.max_size:
+                    x, y, row_h = 0, y + row_h + pad, 0
+                if y + h > self.max_size:
+                    rest.append(f)
+                    continue
+                placed.append((f, pygame.Rect(x, y, w, h)))
+                x += w + pad
+                row_h = max(row_h, h)
+                used_w = max(used_w, x)
+                used_h = max(used_h, y + h)
+            sheet = pygame.Surface((max(1, used_w), max(1, used_h)), pygame.SRCALPHA)
+            for f, r in placed:
+                # copy nguyên pixel + alpha (MAX lên nền trong suốt)
+                sheet.blit(f, r, special_flags=pygame.BLEND_RGBA_MAX)
+            try:
+                sheet = sheet.convert_alpha()
+            except pygame.error:
+                pass  # chưa có display mode
+            self.sheets.append(sheet)
+            for f, r in placed:
+                self._regions[id(f)] = (sheet, r)
+                self._frames.append(f)
+            todo = rest
+
+    def region(self, frame):
+        # -> (sheet, area) hoặc None nếu frame không nằm trong atlas
+        return self._regions.get(id(frame))
+
+    def item(self, frame, center):
+        # -> (source, dest, area) cho Surface.blits, căn giữa tại center
+        w, h = frame.get_size()
+        dest = (center[0] - w // 2, center[1] - h // 2)
+        reg = self._regions.get(id(frame))
+        if reg is None:
+            return (frame, dest, None)
+        return (reg[0], dest, reg[1])
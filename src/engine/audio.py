@@ -1,25 +1,177 @@
+import hashlib, os, struct
 import pygame
 
+from .trace import traced
+
+# file PCM: header + mẫu thô đúng format mixer (Sound.get_raw) -> Sound(buffer=...) không decode MP3
+PCM_MAGIC = b"RFPC"
+_PCM_HEADER = struct.Struct("<4sIiII")  # magic, freq, size (bit, âm = signed), channels, số byte
+
+# âm lượng tăng thêm mỗi lần trigger trùng bị gộp trong cùng frame (tối đa 1.0)
+MERGE_GAIN = 0.25
+DEFAULT_VOICES = 4
+DEFAULT_PRIORITY = 0
+
+
 class Audio:
-    def __init__(self, sfx_map=None, music_volume=0.8):
+    """
+    SFX: key -> file trong assets/sounds/SFX, decode lười lần đầu play (hoặc preload trên
+    boot pipeline). PCM đã decode theo format mixer được lưu ở cache_dir, lần sau chỉ đọc bytes.
+    play_sfx() chỉ ghi nhận yêu cầu; flush() (1 lần mỗi frame) phát trên pool channel riêng:
+    trigger trùng key trong frame gộp thành 1 voice, mỗi key tối đa max_voices voice,
+    hết channel thì cướp voice có priority thấp hơn (cũ nhất trước).
+    rules: key -> {max_voices, priority, volume}
+    """
+    @traced("Audio.__init__", cat="audio")
+    def __init__(self, sfx_map=None, music_volume=0.8, preload=True, cache_dir=None, channels=16, rules=None):
+        # preload=False: chỉ ghi nhận key -> path, decode khi play hoặc qua decode()/adopt() (boot pipeline)
         self.sfx = {}
+        self.sfx_paths = dict(sfx_map or {})
+        self.cache_dir = cache_dir
         self.music_volume = music_volume
-        if sfx_map:
-            for k, path in sfx_map.items():
-                try:
-                    self.sfx[k] = pygame.mixer.Sound(path)
-                except Exception:
-                    self.sfx[k] = None
+        self.format = pygame.mixer.get_init()  # (freq, size, channels); None -> mixer chưa init
+        self.rules = {str(k).upper(): self._rule(v) for k, v in (rules or {}).items()}
+        pygame.mixer.set_num_channels(int(channels))
+        self.channels = [pygame.mixer.Channel(i) for i in range(int(channels))]
+        self._voices = [None] * len(self.channels)  # channel -> (key, priority, serial)
+        self._serial = 0
+        self._pending = {}  # key -> số lần play_sfx trong frame
+        self.played = self.merged = self.capped = self.stolen = self.dropped = 0
+        self.cache_hits = self.cache_misses = 0
+        if preload:
+            for k in self.sfx_paths:
+                self.sound(k)
         try:
             pygame.mixer.music.set_volume(music_volume)
         except Exception:
             pass
 
+    @staticmethod
+    def _rule(cfg):
+        cfg = cfg or {}
+        return (max(1, int(cfg.get("max_voices", DEFAULT_VOICES))),
+                int(cfg.get("priority", DEFAULT_PRIORITY)),
+                float(cfg.get("volume", 1.0)))
+
+    def rule(self, key):
+        return self.rules.get(key) or self._rule(None)
+
+    # ---------- load ----------
+    def sound(self, key):
+        # Sound của key, decode lần đầu cần (None = không có file / lỗi, không thử lại)
+        if key not in self.sfx:
+            path = self.sfx_paths.get(key)
+            self.sfx[key] = self.decode(path) if path else None
+        return self.sfx[key]
+
+    def decode(self, path):
+        # đọc PCM cache hoặc decode file + ghi cache; chạy được trên worker thread
+        cached = self.cache_path(path)
+        if cached:
+            snd = self._read_pcm(cached)
+            if snd is not None:
+                self.cache_hits += 1
+                return snd
+        try:
+            snd = pygame.mixer.Sound(path)
+        except Exception:
+            return None
+        self.cache_misses += 1
+        if cached:
+            self._write_pcm(cached, snd)
+        return snd
+
+    def adopt(self, key, snd):
+        self.sfx[key] = snd
+
+    def cache_path(self, path):
+        # key = (path, mtime, size) file gốc + format mixer, chỉ stat (không đọc file gốc):
+        # sửa file hoặc đổi tần số/kênh -> entry mới
+        if not (self.cache_dir and self.format):
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}|{st.st_mtime_ns}|{st.st_size}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        freq, size, ch = self.format
+        return os.path.join(self.cache_dir, f"{digest}_{freq}_{size}_{ch}.pcm")
+
+    def _read_pcm(self, cached):
+        try:
+            with open(cached, "rb") as f:
+                data = f.read()
+            magic, freq, size, ch, n = _PCM_HEADER.unpack_from(data)
+            if magic != PCM_MAGIC or (freq, size, ch) != tuple(self.format) or len(data) != _PCM_HEADER.size + n:
+                return None
+            return pygame.mixer.Sound(buffer=data[_PCM_HEADER.size:])
+        except (OSError, struct.error, ValueError, pygame.error):
+            return None
+
+    def _write_pcm(self, cached, snd):
+        try:
+            raw = snd.get_raw()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{cached}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_PCM_HEADER.pack(PCM_MAGIC, *self.format, len(raw)))
+                f.write(raw)
+            os.replace(tmp, cached)
+        except (OSError, pygame.error):
+            pass
+
+    # ---------- play ----------
+    @traced(cat="audio")
     def play_sfx(self, key):
-        snd = self.sfx.get(key)
-        if snd:
-            try: snd.play()
-            except Exception: pass
+        self._pending[key] = self._pending.get(key, 0) + 1
+
+    @traced(cat="audio")
+    def flush(self):
+        # GameApp.run gọi sau update mỗi frame; key priority cao được chọn channel trước
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        for key in sorted(pending, key=lambda k: -self.rule(k)[1]):
+            n = pending[key]
+            self.merged += n - 1
+            self._start(key, n)
+
+    def _start(self, key, n):
+        snd = self.sound(key)
+        if snd is None:
+            return
+        cap, prio, vol = self.rule(key)
+        # channel bị phát ngoài pool (Sound.play trực tiếp) coi như voice priority thấp nhất
+        voices = [v or (None, DEFAULT_PRIORITY - 1, 0) for v in self._voices]
+        busy = []
+        free = None
+        for i, ch in enumerate(self.channels):
+            if ch.get_busy():
+                busy.append(i)
+            elif free is None:
+                free = i
+        if sum(1 for i in busy if voices[i][0] == key) >= cap:
+            self.capped += 1
+            return
+        if free is None:
+            # hết channel: cướp voice priority thấp hơn, cũ nhất trước
+            lower = [i for i in busy if voices[i][1] < prio]
+            if not lower:
+                self.dropped += 1
+                return
+            free = min(lower, key=lambda i: (voices[i][1], voices[i][2]))
+            self.channels[free].stop()
+            self.stolen += 1
+        ch = self.channels[free]
+        try:
+            ch.set_volume(min(1.0, vol * (1.0 + MERGE_GAIN * (n - 1))))
+            ch.play(snd)
+        except Exception:
+            return
+        self._serial += 1
+        self._voices[free] = (key, prio, self._serial)
+        self.played += 1
 
     def play_music(self, path, loop=True):
         try:
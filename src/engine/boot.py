@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from . import startup, trace
+
+
+class BootPipeline:
+    """
+    Việc lúc khởi động chạy trên thread pool: fn(*args) chạy ở worker, then(result)
+    chạy ở thread chính (poll / wait) theo đúng thứ tự submit -> kết quả lắp ráp
+    giống hệt khi load tuần tự. Tổng thời gian ~ file chậm nhất thay vì tổng các file.
+    workers=0 -> chạy ngay trên thread gọi submit (không thread).
+    then() được phép submit thêm task (vd. SFX sau khi mixer init xong).
+    """
+    def __init__(self, workers=None):
+        if workers is None:
+            workers = min(8, os.cpu_count() or 2)
+        self.workers = int(workers)
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="boot") if self.workers > 0 else None
+        self._tasks = []   # (label, Future | _Done, then, phase)
+        self._next = 0     # task kế tiếp cần then() ở thread chính
+
+    def submit(self, label, fn, *args, then=None, phase=None):
+        # fn=None: chỉ có bước then() ở thread chính (vd. lắp ráp sau khi các task trước xong)
+        # phase: nhóm trong báo cáo --profile-startup (engine/startup.py), mặc định = label
+        phase = phase or label
+        run = trace.traced(label, cat="boot")(startup.timed(phase, fn)) if fn is not None else None
+        if run is None:
+            job = _Done(None)
+        elif self._pool is None:
+            job = _Done(run(*args))
+        else:
+            job = self._pool.submit(run, *args)
+        self._tasks.append((label, job, then, phase))
+
+    def __len__(self):
+        return len(self._tasks)
+
+    @property
+    def finished(self):
+        # số task worker đã chạy xong (cho thanh tiến trình)
+        return sum(1 for t in self._tasks if t[1].done())
+
+    @property
+    def progress(self):
+        return (self._next + self.finished) / (2.0 * len(self._tasks)) if self._tasks else 1.0
+
+    @property
+    def done(self):
+        return self._next >= len(self._tasks)
+
+    @property
+    def current(self):
+        # label task đang chờ (hiện dưới thanh tiến trình)
+        return self._tasks[self._next][0] if not self.done else ""
+
+    def poll(self):
+        # then() mọi task đã xong liền nhau từ đầu hàng đợi; không block
+        while not self.done and self._tasks[self._next][1].done():
+            self._finish_next()
+        return self.done
+
+    def wait(self):
+        while not self.done:
+            self._finish_next()
+
+    def _finish_next(self):
+        label, job, then, phase = self._tasks[self._next]
+        self._next += 1
+        result = job.result()  # lỗi ở worker ném lại ở đây, như khi load tuần tự
+        if then is not None:
+            with trace.span(f"{label} (main)", "boot"), startup.phase(phase):
+                then(result)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class _Done:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self.value
@@ -1,6 +1,12 @@
 import math
+from bisect import bisect_left
 from typing import List, Tuple
 
+try:
+    import numpy as np
+except ImportError:  # batched API (positions) cần numpy; phần còn lại không
+    np = None
+
 Point = Tuple[int, int]
 FPoint = Tuple[float, float]
 
@@ -55,3 +61,90 @@ def project_point_to_t(poly: List[Point], px: int, py: int) -> float:
             best_tlen = run + math.hypot(projx-x1, projy-y1)
         run += math.hypot(vx, vy)
     return max(0.0, min(1.0, best_tlen / total))
+
+class PathGeometry:
+    """
+    Bảng arc-length dựng 1 lần cho 1 polyline (mỗi lane 1 cái, trong GameplayState.enter).
+      - ends[i]  : độ dài tích luỹ tới cuối đoạn i
+      - dirs[i]  : vector đơn vị của đoạn i
+    point_at(t) = bisect + 1 lerp, cho đúng kết quả như sample_path_t().
+    """
+    def __init__(self, points: List[Point]):
+        self.points = list(points)
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.seg_lens: List[float] = []
+        self.dirs: List[FPoint] = []
+        run = 0.0
+        for i in range(len(self.points)-1):
+            x1,y1 = self.points[i]; x2,y2 = self.points[i+1]
+            seg = math.hypot(x2-x1, y2-y1)
+            self.starts.append(run)
+            self.seg_lens.append(seg)
+            self.dirs.append(((x2-x1)/seg, (y2-y1)/seg) if seg > 0 else (0.0, 0.0))
+            run += seg
+            self.ends.append(run)
+        self.total = run
+        self._np = None  # mảng numpy cho positions(), dựng lười
+
+    def _segment(self, target: float) -> int:
+        # đoạn đầu tiên có ends[i] >= target (giống vòng lặp của sample_path_t)
+        return bisect_left(self.ends, target)
+
+    def point_at(self, t: float) -> Point:
+        pts = self.points
+        if not pts: return (0,0)
+        if t <= 0: return pts[0]
+        if t >= 1: return pts[-1]
+        target = t * self.total
+        i = self._segment(target)
+        if i >= len(self.ends):
+            return pts[-1]
+        seg = self.seg_lens[i]
+        k = (target - self.starts[i]) / seg if seg>0 else 0
+        x1,y1 = pts[i]; x2,y2 = pts[i+1]
+        return (int(x1 + (x2-x1)*k), int(y1 + (y2-y1)*k))
+
+    def tangent_at(self, t: float) -> FPoint:
+        if not self.dirs: return (0.0, 0.0)
+        target = min(max(t, 0.0), 1.0) * self.total
+        i = min(self._segment(target), len(self.dirs)-1)
+        # bỏ qua đoạn độ dài 0 (điểm trùng)
+        while i < len(self.dirs)-1 and self.seg_lens[i] <= 0:
+            i += 1
+        return self.dirs[i]
+
+    def points_at(self, ts) -> List[Point]:
+        point_at = self.point_at
+        return [point_at(t) for t in ts]
+
+    def positions(self, ts):
+        """
+        Mảng t (N,) -> mảng toạ độ pixel (N,2) int trong 1 lần gọi (np.searchsorted trên ends).
+        Cho đúng kết quả như point_at() từng phần tử.
+        """
+        ts = np.asarray(ts, dtype=float)
+        out = np.empty((len(ts), 2), dtype=int)
+        pts = self.points
+        if not pts:
+            out[:] = 0
+            return out
+        if self._np is None:
+            self._np = (np.asarray(pts, dtype=float), np.asarray(self.starts), np.asarray(self.ends),
+                        np.asarray(self.seg_lens))
+        P, starts, ends, seg_lens = self._np
+        n_seg = len(ends)
+
+        target = ts * self.total
+        i = np.searchsorted(ends, target, side="left")
+        inside = (ts > 0) & (ts < 1) & (i < n_seg)
+        ii = i[inside]
+        seg = seg_lens[ii]
+        k = np.zeros(len(ii))
+        nz = seg > 0
+        k[nz] = (target[inside][nz] - starts[ii][nz]) / seg[nz]
+        p1 = P[ii]; p2 = P[ii+1]
+        out[inside] = (p1 + (p2 - p1) * k[:, None]).astype(int)
+        out[~inside & (ts <= 0)] = pts[0]
+        out[~inside & (ts > 0)] = pts[-1]
+        return out
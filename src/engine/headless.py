@@ -0,0 +1,177 @@
+import time
+
+from .app import GameApp
+from .replay import Replay, EV_CLICK
+
+
+class HeadlessRunner:
+    """
+    Chạy GameplayState không cửa sổ / không âm thanh / không đồng hồ thật:
+      - GameApp dựng trên SDL dummy driver, bỏ qua decode sprite/VFX
+      - update(dt) với dt cố định, chạy nhanh nhất có thể
+    run_level() trả về cùng dict stats mà some_end_game_path() đưa cho ResultState.
+    """
+    def __init__(self, base_dir, dt=1.0 / 60.0, engine=None, assets=False):
+        # assets: vẫn load sprite/VFX (clip VFX kéo dài thời gian sống BAD) -> cần cho replay
+        self.app = GameApp(base_dir=base_dir, headless=True, load_assets=assets)
+        self.app.config.setdefault("replay", {})["record"] = False
+        self.dt = float(dt)
+        if engine:
+            # "objects" | "arrays" (xem simulation.engine trong game.yaml)
+            self.app.config.setdefault("simulation", {})["engine"] = engine
+
+    @property
+    def levels(self):
+        return self.app.levels
+
+    def find_level(self, key):
+        # key: index (int / "3") hoặc level_id ("L3")
+        for i, lv in enumerate(self.app.levels):
+            if lv.level_id == key:
+                return i
+        return int(key)
+
+    def run_level(self, level_index, seed=None, max_time=None):
+        from states.gameplay import GameplayState  # lazy import (states -> engine)
+
+        gp = GameplayState(self.app)
+        self.app.switch_state(gp, level_index=level_index, seed=seed)
+        return self._run(gp, max_time)
+
+    def run_replay(self, replay):
+        """
+        Chạy lại 1 file replay (engine.replay) nhanh nhất có thể: cùng seed / level / dt,
+        event đưa vào handle_event đúng bước đã ghi. verified = kết quả khớp bản ghi.
+        """
+        from states.gameplay import GameplayState
+
+        rp = Replay.load(replay) if isinstance(replay, str) else replay
+        self.dt = rp.dt
+        self.app.config.setdefault("simulation", {})["engine"] = rp.engine
+        gp = GameplayState(self.app)
+        self.app.switch_state(gp, level_index=rp.level_index, seed=rp.seed)
+
+        pending = list(rp.events)
+        pending.reverse()
+        def dispatch():
+            while pending and pending[-1][0] <= gp.steps and self.app.current_state() is gp:
+                _, kind, a, b = pending.pop()
+                gp.handle_event(Replay.to_event(kind, a, b))
+
+        # dừng đúng bước phiên gốc kết thúc (END), không có END -> bước của event cuối cùng;
+        # không chạy tiếp phần phiên người chơi chưa từng chơi
+        if rp.end is not None:
+            stop_step = rp.end[0]
+        else:
+            stop_step = rp.events[-1][0] if rp.events else 0
+        res = self._run(gp, None, before_step=dispatch, stop_step=stop_step)
+        if rp.end is not None:
+            end_step, production, hp = rp.end
+            # so với chính gp (phiên thoát bằng R / ESC / M không có ResultState)
+            res["verified"] = (gp.steps == end_step and gp.production == production and gp.hp == hp)
+        else:
+            res["verified"] = None  # phiên gốc không đóng file (crash...)
+        res["events"] = len(rp.events)
+        res["clicks"] = sum(1 for e in rp.events if e[1] == EV_CLICK)
+        return res
+
+    def record_session(self, level_index, seed, replay_dir, end_step, end="quit", click_every=15):
+        """
+        Ghi 1 phiên giả lập người chơi ra replay_dir (click vào robot gần cuối lane nhất mỗi
+        click_every bước), kết thúc sớm ở bước end_step:
+          end="quit" -> GameApp.close_states() (đóng cửa sổ / QUIT), "key" -> phím ESC.
+        -> (đường dẫn file replay, (steps, production, hp) lúc kết thúc)
+        """
+        import pygame
+        from states.gameplay import GameplayState
+
+        rcfg = self.app.config.setdefault("replay", {})
+        saved = dict(rcfg)
+        rcfg.update(record=True, dir=replay_dir)
+        try:
+            gp = GameplayState(self.app)
+            self.app.switch_state(gp, level_index=level_index, seed=seed)
+        finally:
+            rcfg.clear()
+            rcfg.update(saved)
+        path = gp.recorder.path if gp.recorder is not None else None
+
+        def player():
+            if gp.steps >= end_step:
+                return
+            if gp.steps and gp.steps % click_every == 0:
+                pos = self._click_target(gp)
+                gp.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos))
+
+        self._run(gp, None, before_step=player, stop_step=end_step)
+        result = (gp.steps, gp.production, gp.hp)
+        if self.app.current_state() is gp:
+            if end == "key":
+                gp.handle_event(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE, mod=0, unicode=""))
+            else:
+                self.app.close_states()
+        return path, result
+
+    @staticmethod
+    def _click_target(gp):
+        # robot đi xa nhất của lane đầu tiên có robot (trúng BAD hoặc trượt -> cả 2 nhánh đều được ghi)
+        if gp.sim is not None:
+            for L in gp.sim.lanes:
+                if len(L):
+                    xs, ys = L.positions()
+                    i = int(L.cols["t"].argmax())
+                    return int(xs[i]), int(ys[i])
+        else:
+            robots = list(gp.robots)
+            if robots:
+                x, y = gp.robot_positions(robots[-1:])[0] or robots[-1].position()
+                return int(x), int(y)
+        return 0, 0
+
+    def _run(self, gp, max_time=None, before_step=None, stop_step=None):
+        # stop_step: dừng khi gp.steps chạm mốc này (sau before_step của bước đó)
+        seed = gp.seed
+
+        # safety cap: level time + margin (game always ends when time runs out)
+        limit = float(max_time if max_time is not None else gp.level.time + 5.0)
+        max_steps = int(limit / self.dt) + 1
+
+        pool = getattr(self.app, "robot_pool", None)
+        pool0 = (pool.hits, pool.misses) if pool is not None else (0, 0)
+
+        steps = 0
+        t0 = time.perf_counter()
+        while self.app.current_state() is gp and steps < max_steps:
+            if before_step is not None:
+                before_step()
+                if self.app.current_state() is not gp:
+                    break  # phím R / ESC / M trong replay
+            if stop_step is not None and gp.steps >= stop_step:
+                break
+            gp.update(self.dt)
+            steps += 1
+        wall = time.perf_counter() - t0
+
+        res = self.app.current_state()
+        if getattr(res, "stats", None) is None:
+            # ran out of steps / stopped / left via R, ESC, M before game over -> report gp stats
+            stats, win = gp.collect_stats(), gp.win
+        else:
+            stats, win = dict(res.stats or {}), bool(getattr(res, "win", False))
+
+        steps = gp.steps
+        sim_time = steps * self.dt
+        pool_stats = None
+        if pool is not None:
+            pool_stats = {"hits": pool.hits - pool0[0], "misses": pool.misses - pool0[1], "free": pool.free_count()}
+        return {
+            "level_id": gp.level.level_id,
+            "seed": seed,
+            "win": win,
+            "stats": stats,
+            "steps": steps,
+            "sim_time": sim_time,
+            "wall_time": wall,
+            "speedup": (sim_time / wall) if wall > 0 else float("inf"),
+            "pool": pool_stats,
+        }
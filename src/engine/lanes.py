@@ -0,0 +1,108 @@
+class RobotLanes:
+    """
+    Robot chia theo lane, mỗi lane giữ sẵn thứ tự t (thay cho sort toàn bộ mỗi frame).
+
+    Trên 1 băng chuyền robot không vượt nhau, nên thứ tự spawn == thứ tự t giảm dần:
+      - add()      : O(1) append (robot mới spawn luôn có t nhỏ nhất lane)
+      - replace()  : O(1) thay tại chỗ (mutate OK -> BAD giữ nguyên t)
+      - discard()  : O(1) đánh dấu bia mộ (None), dọn dẹp định kỳ trong maintain()
+      - __iter__   : theo (lane, t tăng dần)  -> thứ tự update
+      - reversed() : theo (lane, t giảm dần) ngược lại -> ưu tiên click
+    Nếu lỡ có robot vượt nhau (dwell khác nhau...), gọi mark_unsorted(lane) và maintain() sẽ sort lại lane đó.
+    """
+    def __init__(self, n_lanes=0, compact_min=32, compact_ratio=0.25):
+        self._lanes = [[] for _ in range(n_lanes)]   # mỗi lane: list theo thứ tự spawn (t giảm dần)
+        self._dead = [0] * n_lanes                   # số bia mộ mỗi lane
+        self._slot = {}                              # id(robot) -> (lane, index)
+        self._unsorted = set()
+        self.compact_min = compact_min
+        self.compact_ratio = compact_ratio
+
+    def _ensure_lane(self, lane):
+        while len(self._lanes) <= lane:
+            self._lanes.append([])
+            self._dead.append(0)
+
+    def __len__(self):
+        return len(self._slot)
+
+    def __bool__(self):
+        return bool(self._slot)
+
+    def __contains__(self, r):
+        return id(r) in self._slot
+
+    # ---------- thay đổi ----------
+    def add(self, r):
+        lane = getattr(r, "path_id", 0)
+        self._ensure_lane(lane)
+        slots = self._lanes[lane]
+        self._slot[id(r)] = (lane, len(slots))
+        slots.append(r)
+
+    append = add  # tương thích chỗ dùng list.append cũ
+
+    def replace(self, old, new):
+        lane, i = self._slot.pop(id(old))
+        if getattr(new, "path_id", lane) != lane:
+            self._lanes[lane][i] = None
+            self._dead[lane] += 1
+            self.add(new)
+            return
+        self._lanes[lane][i] = new
+        self._slot[id(new)] = (lane, i)
+
+    def discard(self, r):
+        pos = self._slot.pop(id(r), None)
+        if pos is None:
+            return False
+        lane, i = pos
+        self._lanes[lane][i] = None
+        self._dead[lane] += 1
+        return True
+
+    def mark_unsorted(self, lane):
+        self._unsorted.add(lane)
+
+    def maintain(self):
+        # gọi 1 lần/frame, NGOÀI vòng lặp: dọn bia mộ + sort lại lane bị đảo thứ tự
+        for lane, slots in enumerate(self._lanes):
+            dead = self._dead[lane]
+            if lane in self._unsorted or (dead and dead >= max(self.compact_min, len(slots) * self.compact_ratio)):
+                self._rebuild(lane)
+        self._unsorted.clear()
+
+    def _rebuild(self, lane):
+        live = [r for r in self._lanes[lane] if r is not None]
+        if lane in self._unsorted:
+            live.sort(key=lambda r: r.t, reverse=True)
+        self._lanes[lane] = live
+        self._dead[lane] = 0
+        for i, r in enumerate(live):
+            self._slot[id(r)] = (lane, i)
+
+    def clear(self):
+        self._lanes = [[] for _ in self._lanes]
+        self._dead = [0] * len(self._lanes)
+        self._slot.clear()
+        self._unsorted.clear()
+
+    # ---------- duyệt ----------
+    def lane(self, lane):
+        # robots của 1 lane theo t tăng dần
+        if lane < len(self._lanes):
+            for r in reversed(self._lanes[lane]):
+                if r is not None:
+                    yield r
+
+    def __iter__(self):
+        for slots in self._lanes:
+            for r in reversed(slots):
+                if r is not None:
+                    yield r
+
+    def __reversed__(self):
+        for slots in reversed(self._lanes):
+            for r in slots:
+                if r is not None:
+                    yield r
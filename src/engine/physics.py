@@ -1,4 +1,77 @@
+from bisect import bisect_left
+
+
+class BlockerIndex:
+    """
+    Chỉ mục các robot đang chặn băng chuyền (is_bad() and is_blocker() and alive), theo lane, sắp theo t.
+    Cập nhật khi robot bị chặn / được thả / chết (update, remove), trả lời
+    "có blocker nào ở t hoặc phía trước trên lane k" bằng bisect thay vì quét mọi robot.
+    """
+    def __init__(self, n_lanes=0):
+        self._ts = [[] for _ in range(n_lanes)]     # mỗi lane: list (t, seq) tăng dần
+        self._robots = [[] for _ in range(n_lanes)] # song song với _ts
+        self._where = {}                            # id(robot) -> (lane, key)
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._where)
+
+    def __bool__(self):
+        return bool(self._where)
+
+    def __contains__(self, r):
+        return id(r) in self._where
+
+    def _ensure_lane(self, lane):
+        while len(self._ts) <= lane:
+            self._ts.append([]); self._robots.append([])
+
+    def remove(self, r):
+        pos = self._where.pop(id(r), None)
+        if pos is None:
+            return
+        lane, key = pos
+        i = bisect_left(self._ts[lane], key)
+        del self._ts[lane][i]
+        del self._robots[lane][i]
+
+    def update(self, r):
+        # thêm / dời / bỏ r tuỳ trạng thái hiện tại của nó
+        blocking = r.alive and r.is_bad() and r.is_blocker()
+        pos = self._where.get(id(r))
+        if pos is not None:
+            if blocking and pos[0] == r.path_id and pos[1][0] == r.t:
+                return  # không đổi
+            self.remove(r)
+        if not blocking:
+            return
+        lane = r.path_id
+        self._ensure_lane(lane)
+        self._seq += 1
+        key = (r.t, self._seq)
+        i = bisect_left(self._ts[lane], key)
+        self._ts[lane].insert(i, key)
+        self._robots[lane].insert(i, r)
+        self._where[id(r)] = (lane, key)
+
+    def first_ahead(self, lane, t_value, exclude=None, eps=1e-6):
+        # blocker gần nhất có t >= t_value - eps (bỏ qua exclude), không có -> None
+        if lane >= len(self._ts):
+            return None
+        ts, robots = self._ts[lane], self._robots[lane]
+        i = bisect_left(ts, (t_value - eps,))
+        while i < len(robots) and robots[i] is exclude:
+            i += 1
+        return robots[i] if i < len(robots) else None
+
+    def any_ahead(self, lane, t_value, exclude=None, eps=1e-6):
+        return self.first_ahead(lane, t_value, exclude, eps) is not None
+
+
 def first_bad_ahead_on_path(robots, current_robot, path_id, t_value, eps=1e-6):
+    # robots: BlockerIndex (O(log n)) hoặc iterable robot bất kỳ (quét tuyến tính)
+    if isinstance(robots, BlockerIndex):
+        return robots.any_ahead(path_id, t_value, exclude=current_robot, eps=eps)
     for r in robots:
         if r is current_robot:
             continue
@@ -0,0 +1,208 @@
+import gc, time
+from array import array
+
+import pygame
+
+# các phần của 1 frame trong GameApp.run (đúng thứ tự), "wait" = clock.tick (giới hạn FPS)
+SECTIONS = ("wait", "events", "update", "draw", "present")
+COLORS = {
+    "wait": (70, 70, 80),
+    "events": (200, 200, 90),
+    "update": (90, 180, 250),
+    "draw": (120, 220, 120),
+    "present": (230, 140, 60),
+    "gc": (240, 70, 70),
+}
+PANEL_BG = (12, 14, 18)
+
+
+def percentile(sorted_vals, p):
+    # nearest-rank trên list đã sort
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+class FrameProfiler:
+    """
+    Đo thời gian từng phần của mỗi frame (SECTIONS) + thời gian GC (gc.callbacks),
+    lưu vào ring buffer array('d') kích thước cố định -> ghi 1 frame không cấp phát gì.
+    Overlay (F3) vẽ đồ thị frame time xếp chồng theo phần, p50/p95/p99,
+    số robot, spawn/s và pool (state cung cấp qua State.debug_counters()).
+    """
+    def __init__(self, size=240, budget_ms=1000.0 / 60.0, refresh=15):
+        self.size = int(size)
+        self.budget_ms = float(budget_ms)  # vạch ngang trên đồ thị (1 frame ở target_fps)
+        self.refresh = max(1, int(refresh))  # tính lại p50/p95/p99 mỗi refresh frame
+        self.visible = False
+        n = self.size
+        self._buf = {s: array("d", bytes(8 * n)) for s in SECTIONS}
+        self._total = array("d", bytes(8 * n))
+        self._gc = array("d", bytes(8 * n))
+        self._steps = array("l", bytes(array("l").itemsize * n))
+        self._robots = array("l", bytes(array("l").itemsize * n))
+        self._spawned = array("d", bytes(8 * n))
+        self._stamp = array("d", bytes(8 * n))  # perf_counter cuối frame (tính spawn/s)
+        self._i = 0
+        self._n = 0
+        # frame hiện tại
+        self._cur = array("d", bytes(8 * len(SECTIONS)))
+        self._cur_steps = 0
+        self._t0 = self._mark = time.perf_counter()
+        self._gc_t0 = 0.0
+        self._gc_cur = 0.0
+        self.gc_collections = 0
+        gc.callbacks.append(self._on_gc)
+        # overlay
+        self._font = None
+        self._lines = []
+        self._surfs = []
+        self._age = self.refresh
+
+    def close(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_t0 = time.perf_counter()
+        else:
+            self._gc_cur += time.perf_counter() - self._gc_t0
+            self.gc_collections += 1
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._age = self.refresh
+
+    # ---------- ghi (mỗi frame) ----------
+    def begin(self):
+        self._t0 = self._mark = time.perf_counter()
+        cur = self._cur
+        for k in range(len(SECTIONS)):
+            cur[k] = 0.0
+        self._cur_steps = 0
+        self._gc_cur = 0.0
+
+    def mark(self, k):
+        # k: chỉ số trong SECTIONS; cộng dồn thời gian từ mark trước (update có thể chạy nhiều bước)
+        now = time.perf_counter()
+        self._cur[k] += now - self._mark
+        self._mark = now
+
+    def step(self):
+        self._cur_steps += 1
+
+    def end(self, counters=None):
+        i = self._i
+        now = time.perf_counter()
+        for k, s in enumerate(SECTIONS):
+            self._buf[s][i] = self._cur[k] * 1000.0
+        self._total[i] = (now - self._t0) * 1000.0
+        self._gc[i] = self._gc_cur * 1000.0
+        self._steps[i] = self._cur_steps
+        self._stamp[i] = now
+        if counters:
+            self._robots[i] = int(counters.get("robots", 0))
+            self._spawned[i] = float(counters.get("spawned", 0))
+        else:
+            self._robots[i] = 0
+            self._spawned[i] = self._spawned[i - 1] if self._n else 0.0
+        self._i = (i + 1) % self.size
+        if self._n < self.size:
+            self._n += 1
+
+    # ---------- đọc ----------
+    def _order(self):
+        # chỉ số ring từ frame cũ nhất -> mới nhất
+        start = (self._i - self._n) % self.size
+        return [(start + j) % self.size for j in range(self._n)]
+
+    def last(self, section="total"):
+        if not self._n:
+            return 0.0
+        buf = self._total if section == "total" else self._gc if section == "gc" else self._buf[section]
+        return buf[(self._i - 1) % self.size]
+
+    def percentiles(self, section="total", ps=(50, 95, 99)):
+        buf = self._total if section == "total" else self._gc if section == "gc" else self._buf[section]
+        vals = sorted(buf[j] for j in self._order())
+        return tuple(percentile(vals, p) for p in ps)
+
+    def spawns_per_sec(self):
+        if self._n < 2:
+            return 0.0
+        a, b = (self._i - self._n) % self.size, (self._i - 1) % self.size
+        span = self._stamp[b] - self._stamp[a]
+        return (self._spawned[b] - self._spawned[a]) / span if span > 0 else 0.0
+
+    def summary(self):
+        # dict cho log / headless
+        out = {"frames": self._n, "gc_collections": self.gc_collections}
+        for s in ("total",) + SECTIONS + ("gc",):
+            p50, p95, p99 = self.percentiles(s)
+            out[s] = {"p50": p50, "p95": p95, "p99": p99}
+        return out
+
+    # ---------- overlay ----------
+    def _text_lines(self, counters, pool):
+        p50, p95, p99 = self.percentiles("total")
+        lines = [f"frame {self.last():5.1f} ms  p50 {p50:4.1f}  p95 {p95:4.1f}  p99 {p99:4.1f}"]
+        parts = []
+        for s in SECTIONS[1:] + ("gc",):
+            parts.append(f"{s} {self.percentiles(s, (95,))[0]:.1f}")
+        lines.append("p95 " + "  ".join(parts))
+        steps = self._steps[(self._i - 1) % self.size] if self._n else 0
+        lines.append(f"robots {int((counters or {}).get('robots', 0))}  spawn/s {self.spawns_per_sec():.1f}"
+                     f"  steps {steps}  gc {self.gc_collections}")
+        if pool is not None:
+            st = pool.stats()
+            lines.append(f"pool {st['hits']} hit / {st['misses']} miss ({st['hit_rate']:.0f}%)  free {st['free']}")
+        return lines
+
+    def draw(self, surf, counters=None, pool=None, pos=(8, 56)):
+        # -> Rect của panel
+        if self._font is None:
+            pygame.font.init()  # GameApp init font lười
+            self._font = pygame.font.SysFont("consolas,dejavusansmono,monospace", 14)
+        self._age += 1
+        if self._age >= self.refresh:
+            # render thẳng bằng font (không qua app.text: chuỗi đổi liên tục sẽ đẩy chữ HUD khỏi LRU)
+            self._lines = self._text_lines(counters, pool)
+            self._surfs = [self._font.render(l, True, (230, 230, 230)) for l in self._lines]
+            self._age = 0
+
+        line_h = self._font.get_linesize()
+        graph_h = 80
+        w = self.size + 16
+        w = max(w, 8 + max((img.get_width() for img in self._surfs), default=0) + 8)
+        h = 8 + graph_h + 6 + line_h * len(self._lines) + 6
+        x0, y0 = pos
+        panel = pygame.Rect(x0, y0, w, h)
+        surf.fill(PANEL_BG, panel)
+
+        # đồ thị: mỗi frame 1 cột, xếp chồng theo phần (ms -> px, trần = 2x budget)
+        gx, gy = x0 + 8, y0 + 8 + graph_h
+        scale = graph_h / (2.0 * self.budget_ms)
+        for col, j in enumerate(self._order()):
+            x = gx + col
+            y = gy
+            for s in SECTIONS:
+                hpx = self._buf[s][j] * scale
+                if hpx <= 0:
+                    continue
+                top = max(gy - graph_h, y - hpx)
+                if top < y:
+                    pygame.draw.line(surf, COLORS[s], (x, y), (x, top))
+                y = top
+            if self._gc[j] > 0:
+                # GC trong frame: chấm đỏ trên đỉnh cột
+                pygame.draw.line(surf, COLORS["gc"], (x, max(gy - graph_h, y - 2)), (x, y))
+        by = int(gy - self.budget_ms * scale)
+        pygame.draw.line(surf, (200, 200, 200), (gx, by), (gx + self.size, by))
+
+        ty = gy + 6
+        for img in self._surfs:
+            surf.blit(img, (gx, ty))
+            ty += line_h
+        return panel
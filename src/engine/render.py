@@ -17,25 +17,54 @@ def draw_conveyor(surf, path_pts: List[Tuple[int, int]], width=24):
     pygame.draw.lines(surf, BLACK, False, path_pts, 2)
 
 
-def draw_stations(surf, path_pts: List[Tuple[int, int]], station_ts: List[float]):
-    # Vẽ trạm theo cùng 1 nguồn dữ liệu: ts
-    for t in station_ts:
-        x, y = sample_path_t(path_pts, t)
+def draw_stations(surf, path_pts: List[Tuple[int, int]], station_ts: List[float], geom=None):
+    # Vẽ trạm theo cùng 1 nguồn dữ liệu: ts (geom: PathGeometry của lane nếu có)
+    pts = geom.points_at(station_ts) if geom is not None else [sample_path_t(path_pts, t) for t in station_ts]
+    for x, y in pts:
         pygame.draw.circle(surf, GREEN, (x, y), 8)
         pygame.draw.circle(surf, BLACK, (x, y), 8, 2)
 
 
-def draw_hud(surf, font, time_left, production, goal, hp, acc, hits, misses):
+def build_static_layer(size, bg, paths, path_station_ts, geoms=None, conveyor_width=24):
+    # Nền + băng chuyền + trạm: không đổi trong 1 level -> vẽ 1 lần ra Surface riêng, mỗi frame chỉ blit
+    layer = pygame.Surface(size).convert()
+    layer.fill(bg)
+    for i, path in enumerate(paths):
+        draw_conveyor(layer, path, width=conveyor_width)
+        if path_station_ts[i]:
+            draw_stations(layer, path, path_station_ts[i], geoms[i] if geoms else None)
+    return layer
+
+
+def hurry_on(time_left):
+    # "HURRY!" nhấp nháy 5s cuối
+    return 0 < time_left <= 5 and int(time_left * 10) % 2 == 0
+
+
+def hud_key(time_left, production, goal, hp, acc, hits, misses):
+    # những gì draw_hud thực sự hiển thị -> HUD chỉ cần vẽ lại khi key đổi
+    return (max(0, int(time_left)), production, goal, hp, f"{acc:.0f}", hits, misses, hurry_on(time_left))
+
+
+def render_text(font, text, color, renderer=None):
+    # renderer: engine.text.TextRenderer (glyph atlas + LRU), None -> font.render trực tiếp
+    if renderer is not None:
+        return renderer.render(font, text, color)
+    return font.render(text, True, color)
+
+
+def draw_hud(surf, font, time_left, production, goal, hp, acc, hits, misses, text=None):
+    # -> list Rect đã vẽ (thanh HUD + chữ HURRY nếu có)
     W, H = surf.get_size()
-    pygame.draw.rect(surf, UI_BG, (0, 0, W, 48))
+    rects = [pygame.draw.rect(surf, UI_BG, (0, 0, W, 48))]
 
     # Các text
-    t_text = font.render(f"Time: {max(0, int(time_left))}s", True, CREAM)
-    pg_text = font.render(f"Production: {production}/{goal}", True, CREAM)
-    hp_text = font.render(f"HP: {hp}", True, CREAM)
-    hit_text = font.render(f"Hits: {hits}", True, CREAM)
-    miss_text = font.render(f"Misses: {misses}", True, CREAM)
-    acc_text = font.render(f"Acc: {acc:.0f}%", True, CREAM)
+    t_text = render_text(font, f"Time: {max(0, int(time_left))}s", CREAM, text)
+    pg_text = render_text(font, f"Production: {production}/{goal}", CREAM, text)
+    hp_text = render_text(font, f"HP: {hp}", CREAM, text)
+    hit_text = render_text(font, f"Hits: {hits}", CREAM, text)
+    miss_text = render_text(font, f"Misses: {misses}", CREAM, text)
+    acc_text = render_text(font, f"Acc: {acc:.0f}%", CREAM, text)
 
     # Căn vị trí
     surf.blit(t_text, (16, 12))
@@ -51,6 +80,7 @@ def draw_hud(surf, font, time_left, production, goal, hp, acc, hits, misses):
     surf.blit(hp_text, (rx - hp_text.get_width(), 12))
 
     # Cảnh báo khi sắp hết giờ
-    if 0 < time_left <= 5 and int(time_left * 10) % 2 == 0:
-        warn = font.render("HURRY!", True, YELLOW)
-        surf.blit(warn, (W // 2 - warn.get_width() // 2, 48))
+    if hurry_on(time_left):
+        warn = render_text(font, "HURRY!", YELLOW, text)
+        rects.append(surf.blit(warn, (W // 2 - warn.get_width() // 2, 48)))
+    return rects
@@ -0,0 +1,89 @@
+import os, struct, time
+
+import pygame
+
+# File replay (.rfr), little-endian:
+#   header : magic, version, seed, level_index, dt, engine, flags
+#   event* : step (số update đã chạy khi event tới), kind, a, b
+#            CLICK a,b = x,y | KEY a = key code | END a,b = production, hp (để kiểm tra khi replay)
+MAGIC = b"RFRP"
+VERSION = 1
+_HEADER = struct.Struct("<4sBqidBB")
+_EVENT = struct.Struct("<IBii")
+
+EV_END, EV_CLICK, EV_KEY = 0, 1, 2
+ENGINES = ("objects", "arrays")
+FLAG_ASSETS = 1  # phiên gốc có sprite/VFX (VFX kéo dài thời gian sống của BAD -> ảnh hưởng kết quả)
+
+
+class ReplayRecorder:
+    """Ghi seed + click/phím của GameplayState theo số bước mô phỏng."""
+    def __init__(self, path, seed, level_index, dt, engine="objects", assets=False):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._f = open(path, "wb")
+        flags = FLAG_ASSETS if assets else 0
+        eng = ENGINES.index(engine) if engine in ENGINES else 0
+        self._f.write(_HEADER.pack(MAGIC, VERSION, int(seed), int(level_index), float(dt), eng, flags))
+
+    @property
+    def closed(self):
+        return self._f is None
+
+    def _write(self, step, kind, a=0, b=0):
+        if self._f is not None:
+            self._f.write(_EVENT.pack(step, kind, int(a), int(b)))
+
+    def event(self, step, e):
+        # chỉ những event gameplay xử lý: click trái + phím
+        if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
+            x, y = getattr(e, "pos", pygame.mouse.get_pos())
+            self._write(step, EV_CLICK, x, y)
+        elif e.type == pygame.KEYDOWN:
+            self._write(step, EV_KEY, e.key)
+
+    def close(self, step, production=0, hp=0):
+        if self._f is None:
+            return
+        self._write(step, EV_END, production, hp)
+        self._f.close()
+        self._f = None
+
+
+def replay_path(replay_dir, level_id, seed):
+    return os.path.join(replay_dir, f"{level_id}_{time.strftime('%Y%m%d-%H%M%S')}_{seed}.rfr")
+
+
+class Replay:
+    """Replay đã đọc: header + list event (step, kind, a, b), end = (step, production, hp) hoặc None."""
+    def __init__(self, seed, level_index, dt, engine, assets, events, end):
+        self.seed = seed
+        self.level_index = level_index
+        self.dt = dt
+        self.engine = engine
+        self.assets = assets
+        self.events = events
+        self.end = end
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, level_index, dt, eng, flags = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a replay file (v{VERSION}): {path}")
+        events, end = [], None
+        n = (len(data) - _HEADER.size) // _EVENT.size
+        for step, kind, a, b in _EVENT.iter_unpack(data[_HEADER.size:_HEADER.size + n * _EVENT.size]):
+            if kind == EV_END:
+                end = (step, a, b)
+                break
+            events.append((step, kind, a, b))
+        engine = ENGINES[eng] if eng < len(ENGINES) else ENGINES[0]
+        return cls(seed, level_index, dt, engine, bool(flags & FLAG_ASSETS), events, end)
+
+    @staticmethod
+    def to_event(kind, a, b):
+        if kind == EV_CLICK:
+            return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=(a, b))
+        return pygame.event.Event(pygame.KEYDOWN, key=a, mod=0, unicode="")
@@ -0,0 +1,40 @@
+import random, secrets
+
+# mục đích dùng random, mỗi mục 1 stream riêng trên mỗi lane
+PURPOSES = ("spawn", "fail", "variant", "fuse")
+
+
+def new_seed() -> int:
+    return secrets.randbits(62)
+
+
+class LaneRng:
+    """
+    Stream random.Random của 1 lane, tách theo mục đích:
+      spawn   : Spawner chọn loại robot
+      fail    : RobotOK hỏng tại trạm
+      variant : RobotOK chọn biến thể khi hỏng
+      fuse    : RobotBAD lệch fuse_time
+    Thêm/bớt lượt gọi ở 1 mục đích không làm lệch các mục đích khác.
+    """
+    __slots__ = PURPOSES
+
+    def __init__(self, seed, lane):
+        for p in PURPOSES:
+            # seed kiểu str: ổn định giữa các lần chạy / máy (không phụ thuộc hash())
+            setattr(self, p, random.Random(f"{seed}:{lane}:{p}"))
+
+
+class RngStreams:
+    """Tất cả stream của 1 lượt chơi, dựng từ 1 seed duy nhất (ghi vào replay)."""
+    def __init__(self, seed=None, n_lanes=0):
+        self.seed = int(seed) if seed is not None else new_seed()
+        self._lanes = [LaneRng(self.seed, i) for i in range(n_lanes)]
+
+    def lane(self, lane) -> LaneRng:
+        while len(self._lanes) <= lane:
+            self._lanes.append(LaneRng(self.seed, len(self._lanes)))
+        return self._lanes[lane]
+
+    def __len__(self):
+        return len(self._lanes)
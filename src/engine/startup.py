@@ -0,0 +1,95 @@
+import sys, threading, time
+
+# Thời gian từng pha khởi động (python run.py --profile-startup): imports, pygame, font,
+# config, sprite, VFX, SFX, nhạc... tới frame đầu tiên của mỗi state.
+# Tắt (mặc định): phase() trả context rỗng dùng chung, timed() trả lại nguyên hàm.
+ENABLED = False
+_t0 = 0.0
+_lock = threading.Lock()
+_phases = {}  # tên -> [số lần, tổng giây (cộng cả các worker), bắt đầu sớm nhất, kết thúc muộn nhất]
+_frames = {}  # tên state -> thời điểm frame đầu tiên được present
+
+
+def enable(t0=None):
+    # t0: mốc 0 của báo cáo (run.py lấy perf_counter() trước khi import pygame)
+    global ENABLED, _t0
+    ENABLED = True
+    _t0 = time.perf_counter() if t0 is None else t0
+
+
+def add(name, start, end):
+    if not ENABLED:
+        return
+    with _lock:
+        p = _phases.get(name)
+        if p is None:
+            _phases[name] = [1, end - start, start, end]
+        else:
+            p[0] += 1
+            p[1] += end - start
+            p[2] = min(p[2], start)
+            p[3] = max(p[3], end)
+
+
+class _Phase:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add(self.name, self.t0, time.perf_counter())
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name):
+    return _Phase(name) if ENABLED else _NULL_PHASE
+
+
+def timed(name, fn):
+    # bọc fn (chạy ở worker của boot pipeline) để cộng vào pha name
+    if not ENABLED or fn is None:
+        return fn
+
+    def wrapper(*args, **kwargs):
+        with _Phase(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def first_frame(state_name):
+    # True đúng 1 lần cho mỗi state: frame đầu tiên của state đó vừa lên màn hình
+    if not ENABLED or state_name in _frames:
+        return False
+    _frames[state_name] = time.perf_counter()
+    return True
+
+
+def report(out=sys.stdout):
+    ms = lambda t: (t - _t0) * 1e3
+    with _lock:
+        phases = sorted(_phases.items(), key=lambda kv: kv[1][2])
+    print("\nstartup (ms since run.py start; busy = summed over threads)", file=out)
+    print(f"  {'phase':<18} {'calls':>5} {'busy':>9} {'start':>9} {'end':>9}", file=out)
+    for name, (calls, busy, start, end) in phases:
+        print(f"  {name:<18} {calls:>5} {busy * 1e3:9.1f} {ms(start):9.1f} {ms(end):9.1f}", file=out)
+    for name, t in sorted(_frames.items(), key=lambda kv: kv[1]):
+        print(f"  {'first frame':<18} {name:>25} {ms(t):9.1f}", file=out)
+    out.flush()
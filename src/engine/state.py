@@ -1,10 +1,30 @@
 from typing import Any
 
+from . import trace
+
+# method vòng đời được bọc trace (RF_TRACE) ở mọi State con
+TRACED_METHODS = ("enter", "handle_event", "update", "draw", "exit")
+
 class State:
     def __init__(self, app):
         self.app = app
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if trace.ENABLED:
+            for name in TRACED_METHODS:
+                fn = cls.__dict__.get(name)
+                if fn is not None:
+                    setattr(cls, name, trace.traced(f"{cls.__name__}.{name}", cat="state")(fn))
+
     def enter(self, **kwargs): pass
     def handle_event(self, e): pass
     def update(self, dt: float): pass
     def draw(self, screen): pass
+    # dirty-rect mode: list Rect đã đổi trong lần draw() vừa rồi, None = cả màn hình
+    def dirty_rects(self): return None
+    # buộc draw() kế tiếp vẽ lại toàn bộ (vd. sau khi tắt overlay profiler)
+    def invalidate(self): pass
+    # số liệu cho overlay profiler: {"robots": n, "spawned": tổng đã spawn} hoặc None
+    def debug_counters(self): return None
     def exit(self): pass
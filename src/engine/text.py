@@ -0,0 +1,127 @@
+import string, unicodedata
+from collections import OrderedDict
+
+import pygame
+
+
+def _vietnamese_chars():
+    # chữ cái tiếng Việt dựng sẵn (NFC): nguyên âm x 5 dấu thanh + đ/Đ
+    vowels = "aăâeêioôơuưy"
+    tones = "\u0300\u0301\u0309\u0303\u0323"  # huyền, sắc, hỏi, ngã, nặng
+    out = ["đĐ"]
+    for v in vowels + vowels.upper():
+        out.append(v)
+        out.extend(unicodedata.normalize("NFC", v + t) for t in tones)
+    return "".join(out)
+
+
+DEFAULT_CHARSET = string.printable.strip() + " " + _vietnamese_chars()
+
+
+class GlyphAtlas:
+    """
+    Glyph của 1 font + 1 màu, rasterize 1 lần vào 1 surface chung.
+    render(text) ghép chuỗi bằng Surface.blits từ atlas; ký tự chưa có được thêm lười.
+    """
+    def __init__(self, font, color, chars=DEFAULT_CHARSET):
+        self.font = font
+        self.color = tuple(color)
+        self.height = font.get_height()
+        self.surface = None
+        self._glyphs = {}  # ch -> (area trong atlas, advance)
+        self.add(chars)
+
+    def __contains__(self, ch):
+        return ch in self._glyphs
+
+    def add(self, chars):
+        new = [ch for ch in dict.fromkeys(chars) if ch not in self._glyphs and ch.isprintable()]
+        if not new:
+            return
+        imgs = [(ch, self.font.render(ch, True, self.color)) for ch in new]
+        self.height = max([self.height] + [img.get_height() for _, img in imgs])
+        x = self.surface.get_width() if self.surface is not None else 0
+        w = x + sum(img.get_width() for _, img in imgs)
+        atlas = pygame.Surface((max(1, w), self.height), pygame.SRCALPHA)
+        if self.surface is not None:
+            atlas.blit(self.surface, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        for ch, img in imgs:
+            # copy nguyên alpha (MAX lên nền trong suốt) thay vì alpha-blend
+            atlas.blit(img, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            m = self.font.metrics(ch)
+            adv = m[0][4] if m and m[0] else img.get_width()
+            self._glyphs[ch] = (pygame.Rect(x, 0, img.get_width(), img.get_height()), adv)
+            x += img.get_width()
+        self.surface = atlas
+
+    def size(self, text):
+        text = unicodedata.normalize("NFC", text)
+        self.add(text)
+        w = x = 0
+        for ch in text:
+            g = self._glyphs.get(ch)
+            if g is None:
+                continue
+            w = max(w, x + g[0].w)
+            x += g[1]
+        return w, self.height
+
+    def render(self, text):
+        text = unicodedata.normalize("NFC", text)
+        self.add(text)
+        batch = []
+        w = x = 0
+        for ch in text:
+            g = self._glyphs.get(ch)
+            if g is None:
+                continue  # ký tự điều khiển
+            area, adv = g
+            batch.append((self.surface, (x, 0), area, pygame.BLEND_RGBA_MAX))
+            w = max(w, x + area.w)
+            x += adv
+        out = pygame.Surface((max(1, w), self.height), pygame.SRCALPHA)
+        if batch:
+            out.blits(batch, doreturn=False)
+        return out
+
+
+class TextRenderer:
+    """
+    Vẽ chữ qua GlyphAtlas (mỗi cặp font/màu 1 atlas) + LRU các chuỗi đã ghép,
+    key (font, text, color). HUD chỉ đổi vài chữ số -> gần như luôn trúng cache.
+    """
+    def __init__(self, max_strings=256, charset=DEFAULT_CHARSET):
+        self.max_strings = int(max_strings)
+        self.charset = charset
+        self._atlases = {}
+        self._strings = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def atlas(self, font, color):
+        key = (font, tuple(color))
+        a = self._atlases.get(key)
+        if a is None:
+            a = self._atlases[key] = GlyphAtlas(font, color, self.charset)
+        return a
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        img = self._strings.get(key)
+        if img is not None:
+            self._strings.move_to_end(key)
+            self.hits += 1
+            return img
+        self.misses += 1
+        img = self.atlas(font, color).render(text)
+        self._strings[key] = img
+        if len(self._strings) > self.max_strings:
+            self._strings.popitem(last=False)
+        return img
+
+    def blit(self, surf, font, text, color, pos):
+        return surf.blit(self.render(font, text, color), pos)
+
+    def clear(self):
+        self._atlases.clear()
+        self._strings.clear()
@@ -0,0 +1,176 @@
+import atexit, collections, functools, json, os, threading, time
+
+# Chrome / Perfetto trace-event JSON (chrome://tracing, ui.perfetto.dev).
+# Bật bằng biến môi trường lúc khởi động:
+#   RF_TRACE=1            -> traces/trace_<time>.json
+#   RF_TRACE=path.json    -> ghi ra path.json
+# Tắt (mặc định): @traced trả lại nguyên hàm gốc, span() trả context rỗng dùng chung,
+# begin/end/counter/instant là hàm rỗng -> gần như không tốn gì.
+_ENV = os.environ.get("RF_TRACE", "").strip()
+ENABLED = bool(_ENV) and _ENV.lower() not in ("0", "false", "no", "off")
+
+
+def trace_path(value=_ENV):
+    if value.lower() in ("1", "true", "yes", "on"):
+        return os.path.join("traces", f"trace_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    return value
+
+
+class TraceWriter:
+    """
+    Gom event vào deque (append an toàn giữa các thread), thread nền định kỳ
+    chuyển thành JSON và ghi ra file -> thread game không chờ I/O.
+    Event: (ph, name, cat, ts_us, dur_us, tid, args).
+    """
+    def __init__(self, path, flush_interval=0.5):
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self.path = path
+        self.flush_interval = float(flush_interval)
+        self.pid = os.getpid()
+        self.written = 0
+        self._t0 = time.perf_counter()
+        self._q = collections.deque()
+        self._f = open(path, "w", encoding="utf-8")
+        self._f.write("[\n")
+        self._first = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="trace-writer", daemon=True)
+        self._thread.start()
+        self.thread_name(threading.get_ident(), threading.current_thread().name)
+
+    def ts(self, t=None):
+        # perf_counter -> micro giây kể từ lúc mở trace
+        return ((time.perf_counter() if t is None else t) - self._t0) * 1e6
+
+    def emit(self, ph, name, cat="", t=None, dur=0.0, args=None):
+        self._q.append((ph, name, cat, self.ts(t), dur, threading.get_ident(), args))
+
+    def thread_name(self, tid, name):
+        self._q.append(("M", "thread_name", "", 0.0, 0.0, tid, {"name": name}))
+
+    def _encode(self, ev):
+        ph, name, cat, ts, dur, tid, args = ev
+        d = {"ph": ph, "name": name, "pid": self.pid, "tid": tid, "ts": round(ts, 3)}
+        if cat:
+            d["cat"] = cat
+        if ph == "X":
+            d["dur"] = round(dur, 3)
+        elif ph == "i":
+            d["s"] = "t"
+        if args:
+            d["args"] = args
+        return json.dumps(d, separators=(",", ":"))
+
+    def _drain(self):
+        q, out = self._q, []
+        while q:
+            out.append(self._encode(q.popleft()))
+        if not out:
+            return
+        sep = ",\n"
+        self._f.write(("" if self._first else sep) + sep.join(out))
+        self._first = False
+        self.written += len(out)
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+            self._f.flush()
+
+    def close(self):
+        if self._f is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._drain()
+        self._f.write("\n]\n")
+        self._f.close()
+        self._f = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "t0")
+
+    def __init__(self, name, cat, args):
+        self.name, self.cat, self.args = name, cat, args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter()
+        _writer.emit("X", self.name, self.cat, self.t0, (t1 - self.t0) * 1e6, self.args)
+        return False
+
+
+def traced(name=None, cat="func"):
+    """
+    Decorator: mỗi lần gọi -> 1 complete event ("X"). Dùng @traced hoặc @traced("tên", cat=...).
+    Trace tắt -> trả lại đúng hàm gốc (không có lớp bọc).
+    """
+    if callable(name):
+        return traced()(name)
+
+    def deco(fn):
+        if not ENABLED:
+            return fn
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _writer.emit("X", label, cat, t0, (time.perf_counter() - t0) * 1e6)
+        return wrapper
+    return deco
+
+
+def _noop(*args, **kwargs):
+    pass
+
+
+if ENABLED:
+    _writer = TraceWriter(trace_path())
+    atexit.register(_writer.close)
+
+    def span(name, cat="", **args):
+        return _Span(name, cat, args or None)
+
+    def begin(name, cat=""):
+        _writer.emit("B", name, cat)
+
+    def end(name, cat=""):
+        _writer.emit("E", name, cat)
+
+    def instant(name, cat="", **args):
+        _writer.emit("i", name, cat, args=args or None)
+
+    def counter(name, **values):
+        _writer.emit("C", name, args=values)
+
+    def close():
+        _writer.close()
+else:
+    _writer = None
+
+    def span(name, cat="", **args):
+        return _NULL_SPAN
+
+    begin = end = instant = counter = close = _noop
@@ -6,10 +6,10 @@ from .bad import RobotBAD
 # from .bad_runner import RobotBadRunner
 
 @register_robot("OK")
-class _OK(RobotOK): pass
+class _OK(RobotOK): __slots__ = ()
 
 @register_robot("BAD")
-class _B(RobotBAD): pass
+class _B(RobotBAD): __slots__ = ()
 
 # @register_robot("BAD_EXPLODER")
 # class _BE(RobotBadExploder): pass
@@ -0,0 +1,461 @@
+"""
+Array-backed (struct-of-arrays) robot engine.
+
+Mỗi lane giữ trạng thái robot trong các mảng NumPy (t, dwell, trạm kế tiếp, fuse, animation...)
+và cập nhật tất cả bằng 1 bước vector hoá. Hành vi bám sát RobotBase/RobotOK/RobotBAD:
+  - cùng phép tính số thực -> cùng kết quả với object path cho cùng seed
+  - chỉ các sự kiện hiếm (tới trạm, đột biến OK->BAD) chạy bằng Python, theo thứ tự t tăng dần
+    để thứ tự gọi random giống hệt object path.
+NumPy là tuỳ chọn: available() == False nếu không cài.
+"""
+import math, random
+import pygame
+
+try:
+    import numpy as np
+except ImportError:  # engine "arrays" chỉ bật khi có numpy
+    np = None
+
+from data.registry import ROBOT_TYPES
+from .base import ROBOT_RADIUS, TEAL
+from .ok import RobotOK, choose_variant, station_fail_prob
+from .bad import RobotBAD, RED, FUSE_JITTER
+
+KIND_OK, KIND_BAD = 0, 1
+
+# cột "clip": index vào ArraySimulation.clip_names (app.clips); -1 = không có clip
+CLIP_NONE = -1
+
+COLUMNS = {
+    "kind": "i1",
+    "alive": "?",
+    "t": "f8",
+    "t_prev": "f8",             # t ở bước trước (nội suy khi vẽ)
+    "dwell": "f8",              # _dwell_left
+    "next_idx": "i4",           # _next_station_idx
+    "dwell_time": "f8",         # dwell_time_station
+    "spec": "i4",               # index vào ArraySimulation.specs (tham số theo def)
+    # BAD
+    "fuse": "f8",
+    "exploded": "?",
+    "has_event": "?",           # explosion_event != None
+    "playing_vfx": "?",
+    "vfx_left": "f8",
+    # animation (frame tính lúc vẽ từ app.sim_time - clip_start)
+    "clip": "i2",
+    "clip_start": "f8",
+}
+
+
+def available() -> bool:
+    return np is not None
+
+
+def supports(robots_defs) -> bool:
+    """True nếu mọi (type, weight, params) trong level (kể cả variants) đều có bản array (OK/BAD, không chặn băng chuyền)."""
+    for t, _, params in robots_defs:
+        cls = ROBOT_TYPES.get(str(t).upper())
+        if cls is None or not issubclass(cls, (RobotOK, RobotBAD)):
+            return False
+        params = params or {}
+        if params.get("block_line"):
+            return False
+        variants = [(v.get("type", ""), v.get("weight", 1.0), v.get("params", {})) for v in params.get("variants") or []]
+        if variants and not supports(variants):
+            return False
+    return True
+
+
+class _Spec:
+    # tham số bất biến của 1 robot def (dùng chung cho mọi robot spawn từ def đó)
+    __slots__ = ("kind", "fail_prob", "fail_probs", "variants",
+                 "fuse_time", "prod_penalty", "hp_penalty_on_explode", "hp_penalty_on_goal")
+
+    def __init__(self, cls, params):
+        self.kind = KIND_BAD if issubclass(cls, RobotBAD) else KIND_OK
+        self.fail_prob = float(params.get("fail_prob", 0.0))
+        fps = params.get("fail_probs")
+        self.fail_probs = list(fps) if fps is not None else None
+        self.variants = list(params.get("variants") or [])
+        self.fuse_time = float(params.get("fuse_time", 5.0))
+        self.prod_penalty = int(params.get("prod_penalty", 1))
+        self.hp_penalty_on_explode = int(params.get("hp_penalty_on_explode", 1))
+        self.hp_penalty_on_goal = int(params.get("hp_penalty_on_goal", 1))
+
+
+class LaneArrays:
+    """Trạng thái mọi robot trên 1 băng chuyền, dạng cột."""
+    def __init__(self, lane_id, geom, station_ts, rng=None):
+        self.lane_id = lane_id
+        self.geom = geom  # engine.geometry.PathGeometry
+        self.rng = rng    # engine.rng.LaneRng, None -> module random
+        self.station_ts = np.asarray(list(station_ts), dtype="f8")
+        self.cols = {k: np.zeros(0, dtype=dt) for k, dt in COLUMNS.items()}
+        self._pending = []   # rows thêm trong bước hiện tại (spawn / mutate)
+
+    def __len__(self):
+        return len(self.cols["t"])
+
+    def add(self, row):
+        self._pending.append(row)
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        for r in rows:
+            r.setdefault("t_prev", r.get("t", 0.0))
+        for k, dt in COLUMNS.items():
+            new = np.fromiter((r.get(k, 0) for r in rows), dtype=dt, count=len(rows))
+            self.cols[k] = np.concatenate((self.cols[k], new))
+
+    def keep(self, mask):
+        for k in self.cols:
+            self.cols[k] = self.cols[k][mask]
+
+    def positions(self, alpha=None):
+        # t -> (x, y) cho toàn bộ lane trong 1 lần gọi; alpha: nội suy giữa t_prev và t
+        t = self.cols["t"]
+        if alpha is not None:
+            tp = self.cols["t_prev"]
+            t = tp + (t - tp) * alpha
+        xy = self.geom.positions(t)
+        return xy[:, 0], xy[:, 1]
+
+
+class ArraySimulation:
+    """
+    Thay thế list[RobotBase] trong GameplayState khi config `simulation.engine: arrays`.
+      spawn(lane, type, params) -> thêm robot
+      step(dt)                  -> (ok_done, prod_penalty, hp_loss) giống post-process của GameplayState
+      click(mx, my)             -> (hit, award_now) giống RobotBAD.on_clicked
+    """
+    def __init__(self, app, path_geoms, path_station_ts, speed, rngs=None):
+        if np is None:
+            raise RuntimeError("ArraySimulation requires numpy")
+        self.app = app
+        self.speed = float(speed)
+        # rngs: engine.rng.RngStreams (cùng stream theo lane như object path)
+        self.lanes = [LaneArrays(i, g, ts, rngs.lane(i) if rngs is not None else None)
+                      for i, (g, ts) in enumerate(zip(path_geoms, path_station_ts))]
+        self.specs = []
+        self._spec_ids = {}
+
+        # clip dùng chung với object path (engine.animation.ClipLibrary)
+        self.library = getattr(app, "clips", None)
+        self.clip_names = []
+        self._clip_ids = {}
+        lib = self.library
+        self._boom = lib.vfx_clip("BOOM") if lib else None
+        self._effect = lib.vfx_clip("EFFECT") if lib else None
+        # bảng frame cho draw(): id frame -> nguồn / vùng atlas / nửa kích thước
+        self._table = None
+        self._table_atlas = None
+        self._table_index = {}
+        self._clip_fids = {}
+        self._table_arrays = None
+
+    def __len__(self):
+        return sum(len(l) for l in self.lanes)
+
+    # ---------- spawn ----------
+    def _clip_id(self, name):
+        if name is None:
+            return CLIP_NONE
+        cid = self._clip_ids.get(name)
+        if cid is None:
+            cid = self._clip_ids[name] = len(self.clip_names)
+            self.clip_names.append(name)
+        return cid
+
+    def _now(self):
+        return getattr(self.app, "sim_time", 0.0)
+
+    def _spec(self, cls, params):
+        # variant params là bản copy mới mỗi lần -> key theo nội dung, không theo id()
+        key = (cls, repr(sorted(params.items())))
+        sid = self._spec_ids.get(key)
+        if sid is None:
+            sid = self._spec_ids[key] = len(self.specs)
+            self.specs.append((_Spec(cls, params), params))
+        return sid
+
+    def _new_row(self, L, cls, params, start_transition, type_name=""):
+        sid = self._spec(cls, params)
+        spec = self.specs[sid][0]
+        row = {"kind": spec.kind, "alive": True, "spec": sid}
+        if spec.kind == KIND_BAD:
+            # RobotBAD.__init__: cùng lệnh random như object path
+            rand = L.rng.fuse if L.rng is not None else random
+            row["fuse"] = spec.fuse_time + rand.uniform(-FUSE_JITTER, FUSE_JITTER)
+        # RobotBase.__post_init__
+        name = self.library.initial_clip(type_name or cls.__name__, start_transition) if self.library else None
+        row["clip"] = self._clip_id(name)
+        row["clip_start"] = self._now()
+        return row
+
+    def spawn(self, lane_id, type_name, params):
+        cls = ROBOT_TYPES.get(type_name.upper())
+        if cls is None:
+            return
+        row = self._new_row(self.lanes[lane_id], cls, params, False, type_name.upper())
+        row["dwell_time"] = float(params.get("dwell_time_station", 0.35))
+        # chỉ xếp hàng; _step_lane ghép vào cột 1 lần cho cả loạt spawn của bước
+        self.lanes[lane_id].add(row)
+
+    # ---------- simulation ----------
+    def _start_vfx(self, L, idx, clip):
+        c = L.cols
+        c["clip"][idx] = self._clip_id(clip.name)
+        c["clip_start"][idx] = self._now()
+        c["playing_vfx"][idx] = True
+        c["vfx_left"][idx] = clip.length
+
+    def _play_sfx(self, key, times=1):
+        audio = getattr(self.app, "audio", None)
+        if audio:
+            for _ in range(times):
+                try: audio.play_sfx(key)
+                except Exception: pass
+
+    def _step_lane(self, L, dt):
+        L.flush()  # robot spawn trước step (GameplayState) được update ngay trong bước này
+        c = L.cols
+        if not len(L):
+            return 0, 0, 0
+        t_before = c["t"].copy()
+        c["t_prev"][:] = t_before
+        alive0 = c["alive"].copy()
+        bad = alive0 & (c["kind"] == KIND_BAD)
+
+        # --- RobotBAD.update: fuse ---
+        c["fuse"][bad] -= dt
+        newly = bad & (c["fuse"] <= 0) & ~c["exploded"]
+        if newly.any():
+            c["exploded"][newly] = True
+            c["has_event"][newly] = True
+            self._play_sfx("BOOM", int(newly.sum()))
+            if self._boom:
+                for i in np.flatnonzero(newly):
+                    self._start_vfx(L, i, self._boom)
+            else:
+                c["alive"][newly] = False
+
+        # --- RobotBase.update ---
+        base = alive0 & ~newly
+
+        dwelling = base & (c["dwell"] > 0)
+        if dwelling.any():
+            c["dwell"][dwelling] -= dt
+            ended = dwelling & (c["dwell"] <= 0)
+            c["dwell"][ended] = 0.0
+            c["next_idx"][ended] += 1
+
+        moving = base & ~dwelling
+        c["t"][moving] += self.speed * dt
+        finished = moving & (c["t"] >= 1.0)
+        c["t"][finished] = 1.0
+        c["alive"][finished] = False
+
+        nst = len(L.station_ts)
+        cand = moving & ~finished & (c["next_idx"] < nst)
+        reached = np.zeros(len(L), dtype=bool)
+        if nst and cand.any():
+            st = L.station_ts[np.minimum(c["next_idx"], nst - 1)]
+            reached = cand & (c["t"] >= st)
+            c["t"][reached] = st[reached]
+
+        # BAD tới trạm: on_reach_station không làm gì -> dừng dwell
+        rb = reached & (c["kind"] == KIND_BAD)
+        c["dwell"][rb] = c["dwell_time"][rb]
+
+        # OK tới trạm: random theo thứ tự t tăng dần (như object path sau sort)
+        ro = np.flatnonzero(reached & (c["kind"] == KIND_OK))
+        if len(ro):
+            ro = ro[np.lexsort((ro, t_before[ro]))]
+            for i in ro:
+                self._reach_station_ok(L, i)
+
+        # --- RobotBAD.update: đếm ngược VFX ---
+        vfx = base & bad & c["playing_vfx"]
+        if vfx.any():
+            c["vfx_left"][vfx] -= dt
+            done = vfx & (c["vfx_left"] <= 0)
+            c["playing_vfx"][done] = False
+            c["alive"][done] = False
+
+        # --- post-process (GameplayState.update) ---
+        dead = ~c["alive"]
+        ok_done = prod_pen = hp_loss = 0
+        if dead.any():
+            mutated = c["spec"] < 0  # đánh dấu bởi _reach_station_ok
+            counted = dead & ~mutated
+            ok_done = int((counted & (c["kind"] == KIND_OK)).sum())
+            dbad = counted & (c["kind"] == KIND_BAD)
+            ev = dbad & c["has_event"]
+            esc = dbad & ~c["has_event"] & (c["t"] >= 1.0)
+            for i in np.flatnonzero(ev | esc):
+                spec = self.specs[c["spec"][i]][0]
+                if ev[i]:
+                    prod_pen += spec.prod_penalty
+                    hp_loss += spec.hp_penalty_on_explode
+                else:
+                    hp_loss += spec.hp_penalty_on_goal
+            L.keep(~dead)
+        L.flush()
+        return ok_done, prod_pen, hp_loss
+
+    def _reach_station_ok(self, L, i):
+        c = L.cols
+        spec, _ = self.specs[c["spec"][i]]
+        p = station_fail_prob(spec.fail_prob, spec.fail_probs, int(c["next_idx"][i]))
+        rng = L.rng
+        if p > 0 and (rng.fail if rng is not None else random).random() < p:
+            cls, params = choose_variant(spec.variants, rng.variant if rng is not None else random)
+            if cls is not None:
+                # mutate_to: robot mới kế tục t / trạm / dwell
+                row = self._new_row(L, cls, params, True)
+                row["t"] = c["t"][i]
+                row["next_idx"] = c["next_idx"][i]
+                row["dwell"] = c["dwell"][i]
+                row["dwell_time"] = c["dwell_time"][i]
+                L.add(row)
+                c["alive"][i] = False
+                c["spec"][i] = -1 - c["spec"][i]  # mutated: không tính production
+                return
+        c["dwell"][i] = c["dwell_time"][i]
+
+    def step(self, dt):
+        ok_done = prod_pen = hp_loss = 0
+        for L in self.lanes:
+            a, b, h = self._step_lane(L, dt)
+            ok_done += a; prod_pen += b; hp_loss += h
+        return ok_done, prod_pen, hp_loss
+
+    # ---------- input ----------
+    def click(self, mx, my):
+        # ưu tiên lane cuối, t lớn nhất (giống reversed(self.robots) sau sort)
+        r2 = ROBOT_RADIUS ** 2
+        for L in reversed(self.lanes):
+            if not len(L):
+                continue
+            c = L.cols
+            xs, ys = L.positions()
+            hit = c["alive"] & (c["kind"] == KIND_BAD) & ((mx - xs) ** 2 + (my - ys) ** 2 <= r2)
+            if not hit.any():
+                continue
+            idx = np.flatnonzero(hit)
+            i = idx[np.argmax(c["t"][idx])]
+            return True, self._on_clicked(L, i)
+        return False, False
+
+    def _on_clicked(self, L, i):
+        c = L.cols
+        self._play_sfx("SHUT_DOWN")
+        c["exploded"][i] = True
+        c["has_event"][i] = False
+        if self._effect:
+            self._start_vfx(L, i, self._effect)
+            return False  # award khi VFX xong (giống object path: không cộng hit)
+        keep = np.ones(len(L), dtype=bool); keep[i] = False
+        L.keep(keep)
+        return True
+
+    # ---------- render ----------
+    def _frame_table(self, atlas):
+        # frame của mọi clip -> (source, area, w, h) cho blits; dựng lại khi app.atlas đổi
+        if self._table_atlas is not atlas or self._table is None:
+            self._table_atlas = atlas
+            self._table = ([], [], [], [])
+            self._table_index = {}
+            self._clip_fids = {}
+            self._table_arrays = None
+        return self._table
+
+    def _clip_frame_ids(self, clip, atlas):
+        fids = self._clip_fids.get(clip.name)
+        if fids is None:
+            src, area, ws, hs = self._frame_table(atlas)
+            ids = []
+            for img in clip.frames:
+                fid = self._table_index.get(id(img))
+                if fid is None:
+                    fid = self._table_index[id(img)] = len(src)
+                    reg = atlas.region(img) if atlas is not None else None
+                    src.append(reg[0] if reg else img)
+                    area.append(reg[1] if reg else None)
+                    w, h = img.get_size()
+                    ws.append(w // 2)
+                    hs.append(h // 2)
+                    self._table_arrays = None
+                ids.append(fid)
+            fids = self._clip_fids[clip.name] = np.asarray(ids, dtype=np.int64)
+        return fids
+
+    def _frame_ids(self, clip_ids, elapsed, atlas):
+        # ClipLibrary.resolve + AnimationClip.index_at cho cả mảng, mỗi clip 1 lượt
+        out = np.full(len(clip_ids), -1, dtype=np.int64)
+        lib = self.library
+        for ci in np.unique(clip_ids):
+            m = clip_ids == ci
+            e = elapsed[m]
+            res = np.full(len(e), -1, dtype=np.int64)
+            todo = np.ones(len(e), dtype=bool)
+            clip = lib.get(self.clip_names[ci])
+            while clip is not None and todo.any():
+                nxt = lib.get(clip.next) if not clip.loop and clip.next else None
+                stay = todo & (e < clip.length) if nxt is not None else todo
+                es = e[stay]
+                n = len(clip.frames)
+                if clip.duration > 0:
+                    i = np.where(es > 0, (es / clip.duration).astype(np.int64), 0)
+                else:
+                    i = np.zeros(len(es), dtype=np.int64)
+                i = i % n if clip.loop else np.minimum(i, n - 1)
+                res[stay] = self._clip_frame_ids(clip, atlas)[i]
+                todo &= ~stay
+                e = np.where(todo, e - clip.length, e)
+                clip = nxt
+            out[m] = res
+        return out
+
+    def draw(self, surf, pulse: float, alpha=None):
+        # -> list Rect đã vẽ (dirty-rect rendering)
+        # frame / vị trí / vùng atlas tính bằng mảng cho cả lane, vẽ bằng 1 lần Surface.blits
+        rects = []
+        atlas = getattr(self.app, "atlas", None)
+        now = self._now()
+        bad_r = ROBOT_RADIUS + int(2 * math.sin(pulse * 6.283))
+        self._frame_table(atlas)
+        fids, dxs, dys = [], [], []
+        for L in self.lanes:
+            if not len(L):
+                continue
+            c = L.cols
+            xs, ys = L.positions(alpha)
+            xi, yi = xs.astype(np.int64), ys.astype(np.int64)  # cắt về 0 như int()
+            clips = c["clip"]
+            has = clips >= 0
+            if self.library is not None and has.any():
+                f = self._frame_ids(clips[has], now - c["clip_start"][has], atlas)
+                ok = f >= 0
+                fids.append(f[ok]); dxs.append(xi[has][ok]); dys.append(yi[has][ok])
+            if not has.all():
+                kind = c["kind"]
+                for i in np.flatnonzero(~has):
+                    if kind[i] == KIND_BAD:
+                        rects.append(pygame.draw.circle(surf, RED, (int(xi[i]), int(yi[i])), bad_r))
+                    else:
+                        rects.append(pygame.draw.circle(surf, TEAL, (int(xi[i]), int(yi[i])), ROBOT_RADIUS))
+        if fids:
+            fid = np.concatenate(fids)
+            if len(fid):
+                if self._table_arrays is None:
+                    src, area, ws, hs = self._table
+                    srcs = np.empty(len(src), dtype=object); srcs[:] = src
+                    areas = np.empty(len(area), dtype=object); areas[:] = area
+                    self._table_arrays = (srcs, areas, np.asarray(ws, dtype=np.int64), np.asarray(hs, dtype=np.int64))
+                srcs, areas, hw, hh = self._table_arrays
+                dest = np.column_stack((np.concatenate(dxs) - hw[fid], np.concatenate(dys) - hh[fid])).tolist()
+                rects.extend(surf.blits(zip(srcs[fid], dest, areas[fid])))
+        return rects
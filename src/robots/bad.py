@@ -3,37 +3,53 @@ from .base import RobotBase, ROBOT_RADIUS
 
 # Màu cho BAD robot
 RED = (220, 64, 64)
+# lệch ngẫu nhiên fuse_time (±giây) để tránh nổ cùng lúc
+FUSE_JITTER = 0.5
 
 class RobotBAD(RobotBase):
     USES_STATION_TS = True
+    __slots__ = ("fuse_time", "prod_penalty", "hp_penalty_on_explode", "hp_penalty_on_goal", "block_line",
+                 "_exploded", "_escaped", "explosion_event", "_playing_vfx", "_vfx_time_left")
 
     def __init__(self, *args,
                  fuse_time=5.0,
                  prod_penalty=1,
                  hp_penalty_on_explode=1,
                  hp_penalty_on_goal=1,
+                 block_line=False,
                  **kwargs):
         """
         BAD robot:
           - Sau fuse_time giây sẽ nổ → trừ production & HP.
           - Nếu đi hết đường mà chưa nổ → trừ HP theo hp_penalty_on_goal.
+          - block_line: đứng yên chặn băng chuyền, robot phía sau dừng theo tới khi BAD bị click / nổ.
         """
         super().__init__(*args, **kwargs)
 
         # Tham số gameplay
-        self.fuse_time = float(fuse_time) + random.uniform(-0.5, 0.5)  # lệch nhẹ để tránh nổ cùng lúc
+        rand = self.rng.fuse if self.rng is not None else random
+        self.fuse_time = float(fuse_time) + rand.uniform(-FUSE_JITTER, FUSE_JITTER)  # lệch nhẹ để tránh nổ cùng lúc
         self.prod_penalty = int(prod_penalty)
         self.hp_penalty_on_explode = int(hp_penalty_on_explode)
         self.hp_penalty_on_goal = int(hp_penalty_on_goal)
+        self.block_line = bool(block_line)
 
         # Trạng thái runtime
         self._exploded = False
         self._escaped = False
         self.explosion_event = None  # gameplay sẽ đọc ở update()
+        self._playing_vfx = False    # đang phát VFX nổ / tắt máy, chết khi hết _vfx_time_left
+        self._vfx_time_left = 0.0
 
     def is_bad(self) -> bool:
         return True
 
+    def is_blocker(self) -> bool:
+        return self.block_line and not self._exploded
+
+    def is_stopped(self) -> bool:
+        return self.is_blocker()
+
     def update(self, dt: float, stopped: bool):
         if not self.alive:
             return
@@ -51,32 +67,17 @@ class RobotBAD(RobotBase):
                 try: self.app.audio.play_sfx("BOOM")
                 except Exception: pass
 
-            # Try to play VFX animation (if loaded in app.vfx). If found, set frames and
-            # keep the robot alive until the VFX animation finishes.
-            vframes = None
-            if getattr(self, "app", None) and getattr(self.app, "vfx", None):
-                # prefer common names, fallback to any available vfx
-                vframes = self.app.vfx.get("BOOM")
-                if not vframes:
-                    # fallback to first available VFX list
-                    for vv in self.app.vfx.values():
-                        if vv:
-                            vframes = vv
-                            break
-
-            if vframes:
-               # use VFX frames as the sprite frames for a short non-looping animation
-                self.frames = list(vframes)
-                self.frame_index = 0
-                self.frame_time = 0.0
-                self.frame_duration = 0.12
-                self.animation_loop = False
+            # Play BOOM VFX clip if available and keep the robot alive until it finishes.
+            clips = getattr(self.app, "clips", None)
+            boom = clips.vfx_clip("BOOM") if clips else None
+            if boom:
+                self.play(boom.name)
                 # keep a timer to mark removal when VFX done
                 self._playing_vfx = True
-                self._vfx_time_left = float(self.frame_duration) * max(1, len(self.frames))
+                self._vfx_time_left = boom.length
                 # don't mark alive False yet — wait until VFX finishes
                 return
-            
+
             self.alive = False
             return
 
@@ -96,16 +97,15 @@ class RobotBAD(RobotBase):
         if not self.alive and self.t >= 1.0 and not self._exploded:
             self._escaped = True
 
-    def draw(self, surf, pulse: float, debug=False):
-        # If sprite frames exist (BAD_TRANS / BAD_LOOP), use base drawing so animation shows.
-        if getattr(self, "frames", None):
-            super().draw(surf, pulse, debug)
-            return
+    def draw(self, surf, pulse: float, debug=False, pos=None):
+        # If a clip is playing (BAD_TRANS / BAD_LOOP / VFX), use base drawing so animation shows.
+        if self.current_frame() is not None:
+            return super().draw(surf, pulse, debug, pos)
 
         # fallback: red pulsing circle
-        x, y = self.position()
+        x, y = pos if pos is not None else self.position()
         r = ROBOT_RADIUS + int(2 * math.sin(pulse * 6.283))
-        pygame.draw.circle(surf, RED, (x, y), r)
+        return pygame.draw.circle(surf, RED, (x, y), r)
 
 
     # def on_clicked(self):
@@ -127,31 +127,14 @@ class RobotBAD(RobotBase):
             try: self.app.audio.play_sfx("SHUT_DOWN")
             except Exception: pass
 
-        # Try to play shutdown VFX (prefer SHUTDOWN -> BANG -> BOOM), otherwise remove immediately
-        vframes = None
-        if getattr(self, "app", None) and getattr(self.app, "vfx", None):
-            vframes = self.app.vfx.get("EFFECT")
-            if not vframes:
-                for vv in self.app.vfx.values():
-                    if vv:
-                        vframes = vv
-                        break
-
-        if vframes:
-            self.frames = list(vframes)
-            self.frame_index = 0
-            self.frame_time = 0.0
-            # shorter duration for shutdown VFX: prefer per-vfx config if it's a dict with frame_duration,
-            # otherwise use a short default (0.06s) so the VFX doesn't hang too long.
-            cfg = getattr(self.app, "config", {}).get("vfx", {}).get("EFFECT", None)
-            if isinstance(cfg, dict):
-                self.frame_duration = float(cfg.get("frame_duration", 0.06))
-            else:
-                self.frame_duration = 0.06
-            self.animation_loop = False
+        # Try to play shutdown VFX clip (EFFECT, fallback first VFX), otherwise remove immediately
+        clips = getattr(self.app, "clips", None)
+        effect = clips.vfx_clip("EFFECT") if clips else None
+        if effect:
+            self.play(effect.name)
             # mark playing VFX; Robot.update must count this down and set alive=False afterwards
             self._playing_vfx = True
-            self._vfx_time_left = float(self.frame_duration) * max(1, len(self.frames))
+            self._vfx_time_left = effect.length
             # disable further explosion logic while playing VFX
             self._exploded = True
             self.explosion_event = None
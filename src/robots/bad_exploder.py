@@ -6,6 +6,8 @@ ORANGE=(250,140,40)
 
 class RobotBadExploder(RobotBase):
     USES_STATION_TS = True
+    __slots__ = ("fuse_time", "pause_time", "prod_penalty", "hp_penalty_on_goal",
+                 "_escaped", "_exploded", "explosion_event")
     def __init__(self, *args, fuse_time=5.0, pause_time=5.0,
                  prod_penalty=1, hp_penalty_on_goal=1, **kwargs):
         super().__init__(*args, **kwargs)
@@ -38,11 +40,14 @@ class RobotBadExploder(RobotBase):
         if not self.alive and self.t >= 1.0 and not self._exploded:
             self._escaped = True
 
-    def draw(self, surf, pulse: float, debug=False):
-        x,y = self.position()
+    def sprite_item(self, pos=None):
+        return None  # luôn vẽ hình tròn riêng
+
+    def draw(self, surf, pulse: float, debug=False, pos=None):
+        x,y = pos if pos is not None else self.position()
         flick = 0.5 + 0.5*math.sin(pulse*6.283*2.0)
         color = ORANGE if flick>0.5 else RED
-        pygame.draw.circle(surf, color, (x,y), ROBOT_RADIUS+2)
+        return pygame.draw.circle(surf, color, (x,y), ROBOT_RADIUS+2)
 
     def on_clicked(self):
         self.alive = False
@@ -5,6 +5,7 @@ PURPLE=(150,90,200)
 
 class RobotBadRunner(RobotBase):
     USES_STATION_TS = True
+    __slots__ = ("hp_penalty_on_goal", "_escaped")
     def __init__(self, *args, hp_penalty_on_goal=3, **kwargs):
         super().__init__(*args, **kwargs)
         self.hp_penalty_on_goal = int(hp_penalty_on_goal)
@@ -20,9 +21,12 @@ class RobotBadRunner(RobotBase):
         if not self.alive and self.t >= 1.0:
             self._escaped = True
 
-    def draw(self, surf, pulse: float, debug=False):
-        x,y = self.position()
-        pygame.draw.circle(surf, PURPLE, (x,y), ROBOT_RADIUS+1)
+    def sprite_item(self, pos=None):
+        return None  # luôn vẽ hình tròn riêng
+
+    def draw(self, surf, pulse: float, debug=False, pos=None):
+        x,y = pos if pos is not None else self.position()
+        return pygame.draw.circle(surf, PURPLE, (x,y), ROBOT_RADIUS+1)
 
     def on_clicked(self):
         self.alive = False
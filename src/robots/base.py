@@ -7,15 +7,21 @@ TEAL = (18,148,152)
 YELLOW = (243,198,62)
 ROBOT_RADIUS = 22
 
-@dataclass
+# slots=True: không có __dict__ mỗi instance (nhẹ hơn, truy cập field nhanh hơn);
+# subclass phải khai báo __slots__ cho mọi attribute gán thêm
+@dataclass(slots=True)
 class RobotBase:
     # Quỹ đạo
     path_id: int
     path_pts: List[Tuple[int,int]]
+    # bảng arc-length dùng chung của lane (engine.geometry.PathGeometry), None -> sample_path_t
+    path_geom: Optional[Any] = field(default=None, repr=False)
 
     # Tiến độ dọc path (0..1)
     t: float = 0.0
     alive: bool = True
+    # t ở bước mô phỏng trước (GameplayState gán trước update) -> nội suy vị trí khi vẽ
+    _prev_t: float = field(default=0.0, repr=False)
 
     # Trạm dừng
     station_ts: List[float] = field(default_factory=list)
@@ -33,26 +39,24 @@ class RobotBase:
     # --- added fields for app + animation ---
     app: Optional[Any] = field(default=None, repr=False)
     type_name: str = field(default="", repr=False)
+    # stream random của lane (engine.rng.LaneRng), None -> module random toàn cục
+    rng: Optional[Any] = field(default=None, repr=False)
     
     # optional per-instance scale override: float scale factor or [w,h]
     sprite_scale: Optional[Any] = field(default=None, repr=False)
 
-    # animation
-    frames: List[Any] = field(default_factory=list, repr=False)   # list of pygame.Surface
-    frame_index: int = 0
-    frame_time: float = 0.0
-    frame_duration: float = 0.12
-    animation_loop: bool = True
+    # animation: tên clip dùng chung (app.clips, engine.animation) + lúc bắt đầu theo app.sim_time;
+    # frame tính lười lúc vẽ, không tick trong update
+    clip: Optional[str] = None
+    clip_start: float = 0.0
 
-    # transition control (used when created by mutate_to to play BAD_TRANS then BAD_LOOP)
+    # mutate_to: robot mới phát BAD_TRANS (chuỗi BAD_TRANS -> BAD_LOOP khai báo trong config)
     start_transition: bool = False
-    _is_converting: bool = False
-    _post_transition_frames: List[Any] = field(default_factory=list, repr=False)
-    _post_transition_duration: float = 0.18
 
     # ---------- Hooks ----------
     def is_bad(self) -> bool: return False
     def is_stopped(self) -> bool: return False
+    def is_blocker(self) -> bool: return False   # chặn robot phía sau trên cùng lane (engine.physics)
     def on_reach_station(self, station_idx: int): pass
 
     def mutate_to(self, cls: Type["RobotBase"], **kwargs):
@@ -78,12 +82,14 @@ class RobotBase:
 
         # ensure new instance sees the same app (so it can load sprites)
         kwargs.setdefault("app", getattr(self, "app", None))
+        kwargs.setdefault("rng", self.rng)
         # request the new instance start with BAD transition animation (caller may override)
         kwargs.setdefault("start_transition", True)
 
-        self._mutated_into = cls(
+        kwargs.update(
             path_id=self.path_id,
             path_pts=self.path_pts,
+            path_geom=self.path_geom,
             t=self.t,
             alive=True,
             station_ts=self.station_ts,
@@ -91,67 +97,44 @@ class RobotBase:
             speed=self.speed,
             _next_station_idx=self._next_station_idx,  # <<< giữ trạm hiện tại
             _dwell_left=self._dwell_left,              # <<< giữ thời gian dwell nếu đang dừng
-            **kwargs
         )
-        
+        # lấy robot đã chết từ pool nếu có (GameplayState release robot chết về app.robot_pool)
+        pool = getattr(self.app, "robot_pool", None)
+        self._mutated_into = pool.acquire(cls, **kwargs) if pool is not None else cls(**kwargs)
+
         self._mutated_flag = True
         self.alive = False  # robot cũ “chết”, chỉ còn con mới
 
+    def reset(self, **kwargs):
+        # RobotPool: đưa robot đã chết về đúng trạng thái như vừa khởi tạo bằng cls(**kwargs)
+        # (chạy lại __init__ của class -> cùng field mặc định, cùng lệnh random)
+        type(self).__init__(self, **kwargs)
+
     def get_speed(self) -> float:
         return float(self.speed)
     
     def __post_init__(self):
-        # initialize animation frames using app.sprites if available
-        if getattr(self, "app", None) and getattr(self.app, "sprites", None):
-            spr = self.app.sprites
-            # If explicitly asked to start transition, set BAD_TRANS then schedule BAD_LOOP
-            if self.start_transition:
-                trans = spr.get("BAD_TRANS", [])
-                loop = spr.get("BAD_LOOP", [])
-                if trans:
-                    self.frames = list(trans)
-                    self.frame_index = 0
-                    self.frame_time = 0.0
-                    # slow transition frames
-                    self.frame_duration = 0.45
-                    self.animation_loop = False
-                    self._is_converting = True
-                    self._post_transition_frames = list(loop) if loop else []
-                    self._post_transition_duration = 0.18
-                    return
-            # Otherwise try to pick default frames by type or class
-            # Prefer explicit type_name if provided
-            key = (self.type_name or self.__class__.__name__).upper()
-            if "OK" in key and "OK" in spr:
-                self.frames = list(spr.get("OK", []))
-            elif "BAD" in key and spr.get("BAD_LOOP"):
-                # bad robots created normally (not via transition) get loop frames
-                self.frames = list(spr.get("BAD_LOOP", []))
-                self.frame_duration = 0.18
-                self.animation_loop = True
+        self._prev_t = self.t
+        # chọn clip ban đầu từ thư viện clip dùng chung của app
+        clips = getattr(self.app, "clips", None)
+        if clips:
+            self.clip = clips.initial_clip(self.type_name or self.__class__.__name__, self.start_transition)
+            self.clip_start = getattr(self.app, "sim_time", 0.0)
+
+    def play(self, clip_name):
+        self.clip = clip_name
+        self.clip_start = getattr(self.app, "sim_time", 0.0)
+
+    def current_frame(self):
+        # Surface đang hiển thị theo đồng hồ chung, None nếu không có clip
+        if self.clip is None:
+            return None
+        clips = getattr(self.app, "clips", None)
+        if clips is None:
+            return None
+        return clips.frame(self.clip, getattr(self.app, "sim_time", 0.0) - self.clip_start)
 
     def update(self, dt: float, stopped: bool):
-        # animation tick (before movement)
-        if self.frames:
-            self.frame_time += dt
-            if self.frame_time >= self.frame_duration:
-                self.frame_time -= self.frame_duration
-                self.frame_index += 1
-                if self.frame_index >= len(self.frames):
-                    if self.animation_loop:
-                        self.frame_index = 0
-                    else:
-                        # non-loop animation ended
-                        if self._is_converting and self._post_transition_frames:
-                            # switch to post-transition loop (BAD_LOOP)
-                            self.frames = list(self._post_transition_frames)
-                            self.frame_index = 0
-                            self.frame_time = 0.0
-                            self.frame_duration = float(self._post_transition_duration)
-                            self.animation_loop = True
-                            self._is_converting = False
-                        else:
-                            self.frame_index = len(self.frames) - 1
         if not self.alive: return
 
         # Đang dừng tại trạm
@@ -189,43 +172,43 @@ class RobotBase:
                 return  # đứng yên tại trạm trong dwell
 
     def position(self) -> Tuple[int,int]:
+        if self.path_geom is not None:
+            return self.path_geom.point_at(self.t)
         return sample_path_t(self.path_pts, self.t)
 
-    def draw(self, surf, pulse: float, debug=False):
+    def sprite_item(self, pos=None):
+        # (source, dest, area) cho Surface.blits khi robot vẽ bằng sprite (qua app.atlas nếu có);
+        # None -> phải gọi draw() (hình tròn fallback...)
+        img = self.current_frame()
+        if img is None:
+            return None
+        x, y = pos if pos is not None else self.position()
+        atlas = getattr(self.app, "atlas", None)
+        if atlas is not None:
+            return atlas.item(img, (x, y))
+        w, h = img.get_size()
+        return (img, (x - w // 2, y - h // 2), None)
+
+    def draw(self, surf, pulse: float, debug=False, pos=None):
+        # pos: toạ độ đã tính sẵn theo lô (PathGeometry.positions), None -> tự tính
+        # trả về Rect đã vẽ (dirty-rect rendering)
+        x,y = pos if pos is not None else self.position()
         # draw sprite if available
-        if self.frames:
-            x,y = self.position()
-            img = self.frames[max(0, min(self.frame_index, len(self.frames)-1))]
-            # only blit if it's a pygame.Surface; try to load if it looks like a path; otherwise fallback
-            if isinstance(img, pygame.Surface):
-                rect = img.get_rect(center=(x,y))
-                surf.blit(img, rect)
-                if debug:
-                    pygame.draw.circle(surf, YELLOW, (x,y), ROBOT_RADIUS, 1)
-                return
-            else:
-                # attempt to load if img is a path-like string
-                try:
-                    loaded = pygame.image.load(img).convert_alpha()
-                    # cache loaded surface back into frames
-                    self.frames[max(0, min(self.frame_index, len(self.frames)-1))] = loaded
-                    rect = loaded.get_rect(center=(x,y))
-                    surf.blit(loaded, rect)
-                    if debug:
-                        pygame.draw.circle(surf, YELLOW, (x,y), ROBOT_RADIUS, 1)
-                    return
-                except Exception:
-                    # loading failed -> fallback to circle
-                    pass
+        img = self.current_frame()
+        if img is not None:
+            rect = surf.blit(img, img.get_rect(center=(x,y)))
+            if debug:
+                rect = rect.union(pygame.draw.circle(surf, YELLOW, (x,y), ROBOT_RADIUS, 1))
+            return rect
 
         # fallback visual
-        x,y = self.position()
-        pygame.draw.circle(surf, TEAL, (x,y), ROBOT_RADIUS)
+        rect = pygame.draw.circle(surf, TEAL, (x,y), ROBOT_RADIUS)
         if debug:
             pygame.draw.circle(surf, YELLOW, (x,y), ROBOT_RADIUS, 1)
+        return rect
 
-    def hit_test(self, mx, my) -> bool:
-        x, y = self.position()
+    def hit_test(self, mx, my, pos=None) -> bool:
+        x, y = pos if pos is not None else self.position()
         return (mx-x)**2 + (my-y)**2 <= ROBOT_RADIUS**2
 
     def on_clicked(self):
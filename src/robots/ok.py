@@ -2,37 +2,53 @@ import random
 from .base import RobotBase
 from data.registry import ROBOT_TYPES
 
+def station_fail_prob(fail_prob, fail_probs, station_idx):
+    # fail_probs (theo từng trạm) ưu tiên hơn fail_prob chung
+    if fail_probs is not None and station_idx < len(fail_probs):
+        return float(fail_probs[station_idx])
+    return float(fail_prob)
+
+def choose_variant(variants, rand=random):
+    """Chọn ngẫu nhiên (theo weight) 1 biến thể -> (cls, params). Dùng chung cho object path và array path."""
+    if not variants:
+        return None, {}
+    total = sum(float(v.get("weight",1.0)) for v in variants) or 1.0
+    r = rand.random() * total
+    acc = 0.0
+    for v in variants:
+        acc += float(v.get("weight",1.0))
+        if r <= acc:
+            t = v.get("type","").upper()
+            # params của def dùng chung, không copy: mutate_to(**params) đã tạo dict mới
+            params = v.get("params") or {}
+            cls = ROBOT_TYPES.get(t)
+            if cls: return cls, params
+    v = variants[-1]
+    return ROBOT_TYPES.get(v.get("type","").upper()), v.get("params") or {}
+
 class RobotOK(RobotBase):
+    __slots__ = ("fail_prob", "fail_probs", "variants")
+
     def __init__(self, *args, fail_prob: float=0.0, fail_probs=None, variants=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.fail_prob = float(fail_prob)
-        self.fail_probs = list(fail_probs) if fail_probs is not None else None
-        self.variants = list(variants) if variants else []
+        # list của level def dùng chung (chỉ đọc) -> không copy mỗi lần spawn
+        self.fail_probs = fail_probs
+        self.variants = variants or []
 
     def _choose_variant(self):
-        if not self.variants:
-            return None, {}
-        total = sum(float(v.get("weight",1.0)) for v in self.variants) or 1.0
-        r = random.random() * total
-        acc = 0.0
-        for v in self.variants:
-            acc += float(v.get("weight",1.0))
-            if r <= acc:
-                t = v.get("type","").upper()
-                params = dict(v.get("params",{}))
-                cls = ROBOT_TYPES.get(t)
-                if cls: return cls, params
-        v = self.variants[-1]
-        return ROBOT_TYPES.get(v.get("type","").upper()), dict(v.get("params",{}))
+        return choose_variant(self.variants, self.rng.variant if self.rng is not None else random)
+
+    def station_fail_prob(self, station_idx: int) -> float:
+        return station_fail_prob(self.fail_prob, self.fail_probs, station_idx)
 
     def on_reach_station(self, station_idx: int):
         # Xác suất lỗi tại trạm
-        p = (float(self.fail_probs[station_idx])
-             if (self.fail_probs is not None and station_idx < len(self.fail_probs))
-             else self.fail_prob)
+        p = self.station_fail_prob(station_idx)
         if p <= 0:
             return
-        if random.random() < p:
+        rand = self.rng.fail if self.rng is not None else random
+        if rand.random() < p:
             cls, params = self._choose_variant()
             if cls is not None:
                 # Thay thế tại chỗ: robot cũ chết, robot mới kế tục đủ trạng thái
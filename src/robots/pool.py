@@ -0,0 +1,43 @@
+class RobotPool:
+    """
+    Free-list robot theo từng class. Robot chết (GameplayState.update / click) được release() về
+    pool, acquire() lấy lại và gọi reset(**kwargs) thay vì cấp phát dataclass mới
+    -> bớt rác cho GC khi spawn dày. hits/misses đếm số lần tái dùng / phải tạo mới.
+    """
+    def __init__(self, max_free=1024):
+        self.max_free = int(max_free)
+        self._free = {}   # cls -> list robot đã chết
+        self.hits = 0
+        self.misses = 0
+        self.released = 0
+
+    def acquire(self, cls, **kwargs):
+        free = self._free.get(cls)
+        if free:
+            r = free.pop()
+            r.reset(**kwargs)
+            self.hits += 1
+            return r
+        self.misses += 1
+        return cls(**kwargs)
+
+    def release(self, r):
+        free = self._free.setdefault(type(r), [])
+        if len(free) < self.max_free:
+            free.append(r)
+            self.released += 1
+
+    def free_count(self):
+        return sum(len(v) for v in self._free.values())
+
+    def clear(self):
+        self._free.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (100.0 * self.hits / total) if total else 0.0,
+            "free": self.free_count(),
+        }
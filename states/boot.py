@@ -1,29 +1,71 @@
 import glob
 import os
+import pygame
 from engine.state import State
+from engine.boot import BootPipeline
+from engine import startup
 from .main_menu import MainMenuState
 
+BG = (20, 20, 24)
+BAR_BG = (48, 52, 60)
+BAR_FG = (90, 180, 250)
+
 class BootState(State):
     def enter(self, **kwargs):
-        # Preload minimal configs (maps, levels, i18n)
-        self.app.maps   = self.app.loader.load_maps()
-        self.app.levels = self.app.loader.load_levels()
-        lang = self.app.config.get("language",{}).get("default","vi")
-        self.app.i18n   = self.app.loader.load_i18n(lang)
+        # Preload configs (maps, levels, i18n) + decode sprite/VFX/SFX trên thread pool (engine/boot.py)
+        app = self.app
+        self.pipe = BootPipeline((app.config.get("game", {}) or {}).get("boot_workers"))
+        loader = app.loader
+        lang = app.config.get("language",{}).get("default","vi")
+        self.pipe.submit("load_maps", loader.load_maps, phase="config", then=lambda v: setattr(app, "maps", v))
+        self.pipe.submit("load_levels", loader.load_levels, phase="config", then=lambda v: setattr(app, "levels", v))
+        self.pipe.submit("load_i18n", loader.load_i18n, lang, phase="config", then=lambda v: setattr(app, "i18n", v))
+        app.submit_fonts(self.pipe)
+        app.submit_assets(self.pipe)
+        # mixer init trên worker, xong mới decode SFX + mở nhạc nền
+        if not app.headless:
+            self.pipe.submit("mixer", app.open_audio, phase="mixer", then=self._audio_ready)
+
+        # không async: chờ xong ngay (headless / script cần app.levels sau GameApp())
+        if not getattr(app, "async_boot", False):
+            self.pipe.wait()
+            self._ready()
 
+    def _audio_ready(self, audio):
+        self.app.audio = audio
+        if audio is None:
+            return
+        self.app.submit_sfx(self.pipe)
         # Play background music (first file in assets/sounds/Background if any)
-        try:
-            if getattr(self.app, "audio", None):
+        with startup.phase("music"):
+            try:
                 bg_dir = os.path.join(self.app.base_dir, "assets", "sounds", "Background")
                 if os.path.isdir(bg_dir):
                     files = [f for f in glob.glob(os.path.join(bg_dir, "*")) if os.path.isfile(f)]
                     if files:
-                        self.app.audio.play_music(files[1], loop=True)
-        except Exception:
-            pass
+                        audio.play_music(files[1], loop=True)
+            except Exception:
+                pass
+
+    def _ready(self):
         # Go to menu
+        self.pipe.close()
         self.app.switch_state(MainMenuState(self.app))
 
-    def update(self, dt): pass
+    def update(self, dt):
+        if self.pipe.poll():
+            self._ready()
+
     def draw(self, screen):
-        screen.fill((20,20,24))
+        screen.fill(BG)
+        W, H = screen.get_size()
+        bar = pygame.Rect(W // 4, H // 2 - 8, W // 2, 16)
+        pygame.draw.rect(screen, BAR_BG, bar, border_radius=8)
+        fill = bar.copy()
+        fill.w = max(0, int(bar.w * self.pipe.progress))
+        if fill.w:
+            pygame.draw.rect(screen, BAR_FG, fill, border_radius=8)
+        # chưa có font (đang tra trên pipeline) -> chỉ vẽ thanh tiến trình
+        if getattr(self.app, "fonts_ready", False):
+            label = self.app.font.render(f"Loading... {self.pipe.current}", True, (200, 200, 200))
+            screen.blit(label, (bar.x, bar.bottom + 12))
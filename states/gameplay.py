@@ -1,10 +1,16 @@
-import pygame, random
+import os, pygame, random
 from engine.state import State
-from engine.geometry import rescale_points
-from engine.render import draw_conveyor, draw_hud, draw_stations
+from engine import geometry
+from engine.geometry import rescale_points, PathGeometry
+from engine.lanes import RobotLanes
+from engine.physics import BlockerIndex, first_bad_ahead_on_path
+from engine.render import draw_hud, hud_key, render_text, build_static_layer
 from data.registry import ROBOT_TYPES
 from .result import ResultState
 import robots  # ensure registration
+from robots.pool import RobotPool
+from engine.rng import RngStreams
+from engine.replay import ReplayRecorder, replay_path
 BG = (28, 34, 42)
 
 class GameplayState(State):
@@ -27,8 +33,9 @@ class GameplayState(State):
                 stations_cfg=MapStationsCfg(preset="straight_default")
             )
 
-        # Lanes
+        # Lanes (+ bảng arc-length dựng 1 lần / lane)
         self.paths = [rescale_points(ps.points, W, H) for ps in self.map.paths]
+        self.path_geoms = [PathGeometry(p) for p in self.paths]
 
         # Stations -> ts
         self.path_station_ts = []
@@ -37,13 +44,28 @@ class GameplayState(State):
             ts = res["ts"] or [(k+1)/13 for k in range(12)]
             self.path_station_ts.append(ts)
 
+        # robot chết quay về pool (dùng chung cả app, giữ qua các level); pool_size: 0 -> tắt
+        self.pool = getattr(self.app, "robot_pool", None)
+        pool_size = int(self.app.config.get("simulation", {}).get("pool_size", 1024))
+        if self.pool is None and pool_size > 0:
+            self.pool = self.app.robot_pool = RobotPool(pool_size)
+
+        # random theo seed, tách stream theo lane / mục đích (engine/rng.py); seed=None -> seed mới
+        self.rng = RngStreams(kwargs.get("seed"), len(self.paths))
+        self.seed = self.rng.seed
+        self.steps = 0  # số lần update() đã chạy (mốc thời gian cho replay)
+        self.spawned = 0  # tổng robot đã spawn (overlay profiler: spawn/s)
+
         # Robot defs
         robots_defs = [(r.type, r.weight, r.params) for r in self.level.spawn.robots]
+        # giữ sprite/VFX level này dùng (load nếu chưa có) trước khi robot / sim lấy app.clips
+        self.app.acquire_assets(self, self.clip_names(robots_defs))
 
        
         #!fix
         self.spawners = [
-            Spawner(self.level.spawn.interval, robots_defs, i, p, self.path_station_ts[i], self.conveyor_speed, app=self.app)
+            Spawner(self.level.spawn.interval, robots_defs, i, p, self.path_station_ts[i], self.conveyor_speed,
+                    app=self.app, path_geom=self.path_geoms[i], pool=self.pool, rng=self.rng.lane(i))
             for i, p in enumerate(self.paths)
         ]
 
@@ -55,11 +77,66 @@ class GameplayState(State):
         self.hits = 0
         self.misses = 0
 
-        self.robots = []
+        # robots theo lane, giữ sẵn thứ tự t (không sort lại mỗi frame)
+        self.robots = RobotLanes(len(self.paths))
+        # BAD đang chặn băng chuyền (block_line), sắp theo t mỗi lane
+        self.blockers = BlockerIndex(len(self.paths))
+        # Optional array-backed engine (config: simulation.engine = "arrays", cần numpy)
+        self.sim = None
+        if self.app.config.get("simulation", {}).get("engine", "objects") == "arrays":
+            from robots import arrays
+            if arrays.available() and arrays.supports(robots_defs):
+                self.sim = arrays.ArraySimulation(self.app, self.path_geoms, self.path_station_ts,
+                                                  self.conveyor_speed, rngs=self.rng)
+        # layer tĩnh (nền + băng chuyền + trạm), dựng lười ở draw() đầu tiên
+        self._static_layer = None
+        self._static_key = None
+        # dirty-rect mode (game.dirty_rects): vùng robot/HUD của frame trước để xoá bằng layer tĩnh
+        self._drawn_layer = None
+        self._prev_rects = []
+        self._hud_rects = []
+        self._hud_key = None
+        self._dirty = None
         self.pulse = 0.0
         self.game_over = False
+
+        # ghi replay (replay.record trong game.yaml): seed + click/phím theo số bước
+        self.recorder = None
+        rcfg = self.app.config.get("replay", {}) or {}
+        if rcfg.get("record", False):
+            rdir = rcfg.get("dir", "replays")
+            if not os.path.isabs(rdir):
+                rdir = os.path.join(self.app.base_dir, rdir)
+            engine = "arrays" if self.sim is not None else "objects"
+            try:
+                self.recorder = ReplayRecorder(replay_path(rdir, self.level.level_id, self.seed), self.seed,
+                                               self.level_index, getattr(self.app, "fixed_dt", 1.0 / 60.0),
+                                               engine, assets=bool(getattr(self.app, "vfx", None)))
+            except OSError:
+                self.recorder = None
         self.win = False
 
+    def robot_positions(self, robots, alpha=None):
+        # toạ độ mọi robot: 1 lần tra theo lô mỗi lane thay vì N lần sample_path_t
+        # alpha: nội suy t giữa bước mô phỏng trước và hiện tại (app.frame_alpha), None -> t hiện tại
+        if alpha is None:
+            ts = [r.t for r in robots]
+        else:
+            ts = [r._prev_t + (r.t - r._prev_t) * alpha for r in robots]
+        out = [None] * len(robots)
+        if geometry.np is None:
+            if alpha is None:
+                return out  # robot tự tính position()
+            return [self.path_geoms[r.path_id].point_at(t) for r, t in zip(robots, ts)]
+        by_lane = {}
+        for k, r in enumerate(robots):
+            by_lane.setdefault(r.path_id, []).append(k)
+        for lane, idx in by_lane.items():
+            xy = self.path_geoms[lane].positions([ts[k] for k in idx])
+            for k, p in zip(idx, xy.tolist()):
+                out[k] = p
+        return out
+
     def accuracy(self):
         total = self.hits + self.misses
         return (self.hits/total)*100.0 if total>0 else 100.0
@@ -78,11 +155,21 @@ class GameplayState(State):
         #                 break
         #     if not hit: self.misses += 1
 
+        if self.recorder is not None and not self.game_over:
+            self.recorder.event(self.steps, e)
+
         if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1 and not self.game_over:
             mx, my = getattr(e, "pos", pygame.mouse.get_pos())
             hit = False
-            for r in reversed(self.robots):
-                if not (r.is_bad() and r.alive and r.hit_test(mx, my)):
+            if self.sim is not None:
+                hit, award_now = self.sim.click(mx, my)
+                if award_now:
+                    self.hits += 1
+            # ưu tiên robot vẽ sau cùng (lane cuối, t lớn nhất)
+            candidates = list(reversed(self.robots))
+            positions = self.robot_positions(candidates)
+            for r, pos in zip(candidates, positions):
+                if not (r.is_bad() and r.alive and r.hit_test(mx, my, pos)):
                     continue
                 res = r.on_clicked()
                 if not res:
@@ -94,11 +181,12 @@ class GameplayState(State):
                         # immediate award + remove
                         self.hits += 1
                         r.alive = False
-                        try: self.robots.remove(r)
-                        except ValueError: pass
+                        self.robots.discard(r)
+                        self.blockers.remove(r)
+                        self._release(r)
                     else:
-                        # deferred: VFX playing, do nothing now; Robot.update will clear alive when done
-                        pass
+                        # VFX playing: không còn chặn băng chuyền
+                        self.blockers.update(r)
                 break
             if not hit:
                 self.misses += 1
@@ -118,6 +206,7 @@ class GameplayState(State):
 
     def update(self, dt):
         if self.game_over: return
+        self.steps += 1
 
         # Time
         self.time_left -= dt
@@ -127,28 +216,63 @@ class GameplayState(State):
             self.win = (self.production >= self.goal)
 
         self.pulse = (self.pulse + dt) % 1.0
+        # đồng hồ chung cho animation clip (robot chỉ lưu clip_start)
+        self.app.sim_time = getattr(self.app, "sim_time", 0.0) + dt
+
+        # Spawn + update robots
+        if self.sim is not None:
+            prod_delta, hp_loss = self._update_arrays(dt)
+        else:
+            prod_delta, hp_loss = self._update_robots(dt)
+
+        # Áp dụng
+        if prod_delta != 0:
+            self.production = max(0, self.production + prod_delta)
+        if hp_loss > 0:
+            self.hp -= hp_loss
+            if self.hp <= 0:
+                self.hp = 0
+                self.game_over = True
+                self.win = False
+
+        # Win
+        if self.production >= self.goal:
+            self.game_over = True
+            self.win = True
 
+        if self.game_over:
+            #self.app.switch_state(ResultState(self.app), win=self.win)
+            # go to result state with stats
+            self.some_end_game_path()
+
+    def _update_robots(self, dt):
         # Spawn
         for sp in self.spawners:
-            new_r = sp.try_spawn(dt)
-            if new_r: self.robots.append(new_r)
+            for new_r in sp.spawn_due(dt):
+                self.robots.append(new_r)
+                self.spawned += 1
 
-        # Update robots
-        self.robots.sort(key=lambda r:(getattr(r,"path_id",-1), r.t))
+        # Update robots (thứ tự lane, t tăng dần có sẵn; chỉ dọn bia mộ / sort lại lane bị đảo)
+        self.robots.maintain()
+        blockers = self.blockers
         for r in self.robots:
-            r.update(dt, stopped=False)
-
+            r._prev_t = r.t  # cho nội suy khi vẽ
+            # robot phía sau 1 blocker trên cùng lane thì đứng chờ
+            stopped = bool(blockers) and not r.is_blocker() and first_bad_ahead_on_path(blockers, r, r.path_id, r.t)
+            r.update(dt, stopped=stopped)
 
         # Post-process: THAY THẾ robot mutate, xử lý về đích
-        survivors = []
         hp_loss = 0
         prod_delta = 0
+        prev_lane, prev_t = -1, 0.0
         for r in self.robots:
             if not r.alive:
-                # Nếu vừa mutate thì thay thế
+                # Nếu vừa mutate thì thay thế tại chỗ
                 new_r = getattr(r, "_mutated_into", None)
                 if new_r is not None:
-                    survivors.append(new_r)
+                    self.robots.replace(r, new_r)
+                    blockers.update(new_r)
+                    self._release(r)
                     continue
 
                 if r.is_bad():
@@ -164,58 +288,134 @@ class GameplayState(State):
                 else:
                     # OK về đích -> + production
                     self.production += 1
+                self.robots.discard(r)
+                if r in blockers: blockers.remove(r)
+                self._release(r)
             else:
-                survivors.append(r)
+                if r.is_blocker() or r in blockers:
+                    blockers.update(r)
+                # robot vượt nhau (hiếm) -> sort lại lane đó ở frame sau
+                if r.path_id == prev_lane and r.t < prev_t:
+                    self.robots.mark_unsorted(r.path_id)
+                prev_lane, prev_t = r.path_id, r.t
 
-        self.robots = survivors
-
-        # Áp dụng
-        if prod_delta != 0:
-            self.production = max(0, self.production + prod_delta)
-        if hp_loss > 0:
-            self.hp -= hp_loss
-            if self.hp <= 0:
-                self.hp = 0
-                self.game_over = True
-                self.win = False
+        return prod_delta, hp_loss
 
-        # Win
-        if self.production >= self.goal:
-            self.game_over = True
-            self.win = True
+    def _release(self, r):
+        if self.pool is not None:
+            self.pool.release(r)
 
-        if self.game_over:
-            #self.app.switch_state(ResultState(self.app), win=self.win)
-            # go to result state with stats
-            self.some_end_game_path()
+    def _update_arrays(self, dt):
+        # array-backed engine: cùng thứ tự spawn / random như _update_robots
+        for sp in self.spawners:
+            for spec in sp.next_spawns(dt):
+                self.sim.spawn(sp.path_id, *spec)
+                self.spawned += 1
+        ok_done, prod_pen, hp_loss = self.sim.step(dt)
+        self.production += ok_done
+        return -prod_pen, hp_loss
+
+    def static_layer(self, screen):
+        # chỉ dựng lại khi đổi độ phân giải hoặc map
+        key = (screen.get_size(), self.map.map_id)
+        if self._static_layer is None or key != self._static_key:
+            self._static_layer = build_static_layer(screen.get_size(), BG, self.paths,
+                                                    self.path_station_ts, self.path_geoms)
+            self._draw_hints(self._static_layer)  # chữ hint không đổi -> nướng luôn vào layer
+            self._static_key = key
+        return self._static_layer
+
+    def _draw_hints(self, surf):
+        # Hint các nút
+        text = getattr(self.app, "text", None)
+        hint1 = render_text(self.app.font, "[R] Restart", (200, 200, 200), text)
+        hint2 = render_text(self.app.font, "[ESC] Level Select", (200, 200, 0), text)
+        hint3 = render_text(self.app.font, "[M] Main Menu", (255, 150, 150), text)
+        surf.blit(hint1, (20, 60))
+        surf.blit(hint2, (20, 90))
+        surf.blit(hint3, (20, 120))
 
     def draw(self, screen):
-        screen.fill(BG)
-        for i, path in enumerate(self.paths):
-            draw_conveyor(screen, path, width=24)
-            if self.path_station_ts[i]:
-                draw_stations(screen, path, self.path_station_ts[i])  # bản dùng ts
-
-        for r in self.robots:
-            r.draw(screen, pulse=self.pulse, debug=False)
-
-        draw_hud(screen, self.app.font,
-                 self.time_left, self.production, self.goal,
-                 self.hp, self.accuracy(),
-                 self.hits, self.misses)
-
-        # Hint các nút
-        hint1 = self.app.font.render("[R] Restart", True, (200, 200, 200))
-        hint2 = self.app.font.render("[ESC] Level Select", True, (200, 200, 0))
-        hint3 = self.app.font.render("[M] Main Menu", True, (255, 150, 150))
-        screen.blit(hint1, (20, 60))
-        screen.blit(hint2, (20, 90))
-        screen.blit(hint3, (20, 120))
-
-        
-    def some_end_game_path(self):
-        # collect stats from gameplay and switch to ResultState
-        stats = {
+        layer = self.static_layer(screen)
+        # vẽ tăng dần chỉ khi frame trước đã vẽ đúng layer này lên screen
+        incremental = self.app.dirty_rects and layer is self._drawn_layer
+        hud = hud_key(self.time_left, self.production, self.goal, self.hp,
+                      self.accuracy(), self.hits, self.misses)
+
+        if incremental:
+            # xoá robot frame trước bằng đúng vùng đó của layer tĩnh;
+            # HUD đổi nội dung hoặc bị xoá lẹm vào -> xoá luôn HUD để vẽ lại
+            erase = self._prev_rects
+            hud_redraw = hud != self._hud_key or any(r.collidelist(self._hud_rects) >= 0 for r in erase)
+            if hud_redraw:
+                erase = erase + self._hud_rects
+            for r in erase:
+                screen.blit(layer, r, r)
+        else:
+            screen.blit(layer, (0, 0))
+            erase, hud_redraw = [], True
+
+        rects = []
+        alpha = getattr(self.app, "frame_alpha", None)
+        if self.sim is not None:
+            rects.extend(self.sim.draw(screen, self.pulse, alpha))
+        # robot vẽ bằng sprite gom thành (sheet, dest, area) -> 1 lần Surface.blits;
+        # robot tự vẽ (hình tròn) xả batch trước để giữ đúng thứ tự chồng
+        robots = list(self.robots)
+        batch = []
+        for r, pos in zip(robots, self.robot_positions(robots, alpha)):
+            item = r.sprite_item(pos)
+            if item is not None:
+                batch.append(item)
+                continue
+            if batch:
+                rects.extend(screen.blits(batch))
+                batch = []
+            rect = r.draw(screen, pulse=self.pulse, debug=False, pos=pos)
+            if rect is not None:
+                rects.append(rect)
+        if batch:
+            rects.extend(screen.blits(batch))
+
+        # HUD luôn nằm trên robot
+        if hud_redraw or any(r.collidelist(self._hud_rects) >= 0 for r in rects):
+            self._hud_rects = draw_hud(screen, self.app.font,
+                                       self.time_left, self.production, self.goal,
+                                       self.hp, self.accuracy(),
+                                       self.hits, self.misses, text=getattr(self.app, "text", None))
+            self._hud_key = hud
+            hud_drawn = self._hud_rects
+        else:
+            hud_drawn = []
+
+        self._dirty = (erase + rects + hud_drawn) if incremental else None
+        self._prev_rects = rects
+        self._drawn_layer = layer
+
+    def dirty_rects(self):
+        return self._dirty
+
+    @staticmethod
+    def clip_names(robots_defs):
+        # clip robot của level có thể phát (theo ClipLibrary.initial_clip) + VFX nổ / tắt máy của BAD
+        types = [str(t).upper() for t, _, _ in robots_defs]
+        names = {"BOOM", "EFFECT"}
+        if any("OK" in t for t in types):
+            names.update(("OK", "BAD_TRANS"))  # OK hỏng -> đột biến, phát BAD_TRANS
+        if any("BAD" in t for t in types):
+            names.add("BAD_LOOP")
+        return names
+
+    def invalidate(self):
+        self._drawn_layer = None
+
+    def debug_counters(self):
+        n = len(self.sim) if self.sim is not None else len(self.robots)
+        return {"robots": n, "spawned": self.spawned}
+
+    def collect_stats(self):
+        # stats shown by ResultState (also reported by the headless runner)
+        return {
             "hits": getattr(self, "hits", 0),
             "misses": getattr(self, "misses", 0),
             "accuracy": self.accuracy(),
@@ -224,13 +424,23 @@ class GameplayState(State):
             "time_left": getattr(self, "time_left", 0),
             "hp": getattr(self, "hp", 0),
         }
+
+    def exit(self):
+        if getattr(self, "recorder", None) is not None:
+            self.recorder.close(self.steps, self.production, self.hp)
+            self.recorder = None
+
+    def some_end_game_path(self):
+        # collect stats from gameplay and switch to ResultState
+        stats = self.collect_stats()
         # pass app and stats to ResultState
         self.app.switch_state(ResultState(self.app), stats=stats, win=self.win, app=self.app)
 
 class Spawner:
 
     #!fix
-    def __init__(self, interval, robots_defs, path_id, path_pts, station_ts, speed, app=None):
+    def __init__(self, interval, robots_defs, path_id, path_pts, station_ts, speed, app=None, path_geom=None, pool=None,
+                 rng=None):
         self.interval = interval
         self.timer = 0.0
         self.robot_defs = robots_defs
@@ -239,35 +449,64 @@ class Spawner:
         self.station_ts = list(station_ts)
         self.speed = float(speed)
         self.app = app
-
-    def _weighted_choice(self):
+        self.path_geom = path_geom
+        self.pool = pool  # robots.pool.RobotPool, None -> luôn tạo robot mới
+        self.rng = rng    # engine.rng.LaneRng của lane, None -> module random
+        self._rand = rng.spawn if rng is not None else random
+        # kwargs khởi tạo dựng sẵn 1 lần cho mỗi def (không copy params mỗi lần spawn)
+        self._templates = [self._spawn_kwargs(t, p) for t, _, p in robots_defs]
+
+    def _spawn_kwargs(self, t, params):
+        cls = ROBOT_TYPES.get(t.upper())
+        if cls is None:
+            return None, None
+        spawn_params = dict(params)
+        if getattr(cls, "USES_STATION_TS", True):
+            spawn_params.setdefault("station_ts", self.station_ts)
+        spawn_params.setdefault("dwell_time_station", params.get("dwell_time_station", 0.35))
+        spawn_params["speed"] = self.speed  # ép tốc độ băng chuyền thống nhất
+        #! pass app and type_name so robots can access sprites/animation
+        spawn_params.update({"app": self.app, "type_name": t.upper(), "rng": self.rng})
+        spawn_params.update(path_id=self.path_id, path_pts=self.path_pts, path_geom=self.path_geom)
+        return cls, spawn_params
+
+    def _weighted_index(self):
         total = sum(w for _,w,_ in self.robot_defs) or 1.0
-        r = random.random() * total
+        r = self._rand.random() * total
         acc = 0.0
-        for t, w, p in self.robot_defs:
+        for i, (t, w, p) in enumerate(self.robot_defs):
             acc += w
             if r <= acc:
-                return (t, p)
-        return self.robot_defs[-1][0], self.robot_defs[-1][2]
+                return i
+        return len(self.robot_defs) - 1
 
-    def try_spawn(self, dt):
+    def _due(self, dt):
+        # mọi lượt spawn đã tới hạn trong dt (dt > interval -> nhiều lượt, không bỏ sót)
         self.timer += dt
-        if self.timer >= self.interval:
+        out = []
+        while self.timer >= self.interval:
             self.timer -= self.interval
-            t, params = self._weighted_choice()
-            cls = ROBOT_TYPES.get(t.upper())
-            if cls:
-                spawn_params = dict(params)
-                if getattr(cls, "USES_STATION_TS", True):
-                    spawn_params.setdefault("station_ts", self.station_ts)
-                spawn_params.setdefault("dwell_time_station", params.get("dwell_time_station", 0.35))
-                spawn_params["speed"] = self.speed  # ép tốc độ băng chuyền thống nhất
-                # return cls(path_id=self.path_id, path_pts=self.path_pts, **spawn_params)
-            
-                #! pass app and type_name so robots can access sprites/animation
-                extra = {"app": self.app, "type_name": t.upper()}
-                spawn_params.update(extra)
-                return cls(path_id=self.path_id, path_pts=self.path_pts, **spawn_params)
-        return None
+            out.append(self._weighted_index())
+            if self.interval <= 0:
+                break
+        return out
+
+    def next_spawns(self, dt):
+        # -> list (type, params) tới lượt spawn
+        out = []
+        for i in self._due(dt):
+            t, _, p = self.robot_defs[i]
+            out.append((t, p))
+        return out
+
+    def spawn_due(self, dt):
+        # -> list robot mới (lấy từ pool nếu có)
+        out = []
+        for i in self._due(dt):
+            cls, kwargs = self._templates[i]
+            if cls is None:
+                continue
+            out.append(self.pool.acquire(cls, **kwargs) if self.pool is not None else cls(**kwargs))
+        return out
     
     